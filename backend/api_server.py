@@ -8,21 +8,36 @@ MinerU Tianshu - API Server
 企业级认证授权: JWT Token + API Key + SSO
 """
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Depends
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Depends, Request
+from fastapi.responses import ORJSONResponse, FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pathlib import Path
 from loguru import logger
 import uvicorn
-from typing import Optional
-from datetime import datetime
+import orjson
+from typing import Dict, Optional
+from functools import lru_cache
+from datetime import datetime, timedelta
+import io
 import os
 import re
+import mmap
+import mimetypes
+import stat
+import shutil
+import time
+import asyncio
 import uuid
+import hashlib
 from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+import certifi
+import urllib3
 from minio import Minio
 
 from task_db import TaskDB
+from utils import find_result_artifacts
 
 # 导入认证模块
 from auth import (
@@ -39,6 +54,8 @@ app = FastAPI(
     title="MinerU Tianshu API",
     description="天枢 - 企业级 AI 数据预处理平台 | 支持文档、图片、音频、视频等多模态数据处理 | 企业级认证授权",
     version="2.0.0",
+    # 使用 orjson 序列化响应（比标准库 json 快数倍，直接输出 bytes）
+    default_response_class=ORJSONResponse,
     # 不设置 servers，让 FastAPI 自动根据请求的 Host 生成
 )
 
@@ -51,6 +68,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class APIGZipMiddleware(GZipMiddleware):
+    """
+    响应 gzip 压缩（任务结果中的 Markdown/JSON 通常可压缩 5-10 倍）
+
+    输出文件服务（/v1/files/）直接透传：图片等二进制已是压缩格式，
+    且需要保留 Content-Length / Range 等文件响应语义
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/v1/files/"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+app.add_middleware(
+    APIGZipMiddleware,
+    minimum_size=int(os.getenv("GZIP_MINIMUM_SIZE", "1024")),
+    compresslevel=int(os.getenv("GZIP_COMPRESS_LEVEL", "5")),
+)
+
 # 初始化数据库
 # 确保使用环境变量中的数据库路径（与 Worker 保持一致）
 db_path_env = os.getenv("DATABASE_PATH")
@@ -71,6 +110,10 @@ app.include_router(auth_router)
 # 配置输出目录（使用共享目录，Docker 环境可访问）
 OUTPUT_DIR = Path(os.getenv("OUTPUT_PATH", "/app/output"))
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+# 解析后的输出目录（启动时计算一次，文件服务的路径校验直接复用）
+# 末尾带分隔符，避免 /app/output-evil 这类同前缀目录通过 startswith 检查
+_OUTPUT_DIR_RESOLVED = OUTPUT_DIR.resolve()
+_OUTPUT_DIR_PREFIX = str(_OUTPUT_DIR_RESOLVED) + os.sep
 
 # MinIO 配置
 MINIO_CONFIG = {
@@ -82,14 +125,205 @@ MINIO_CONFIG = {
 }
 
 
-def get_minio_client():
-    """获取MinIO客户端实例"""
-    return Minio(
-        MINIO_CONFIG["endpoint"],
-        access_key=MINIO_CONFIG["access_key"],
-        secret_key=MINIO_CONFIG["secret_key"],
-        secure=MINIO_CONFIG["secure"],
-    )
+# Markdown 图片引用正则（模块级预编译，两种格式合并为一个分支模式，单次扫描完成）
+# 1. Markdown 语法：![alt](path)          -> 分组 1: alt, 2: path
+# 2. HTML 标签：<img src="path" ...>      -> 分组 3: src 前属性, 4: path, 5: src 后属性
+IMG_REF_PATTERN = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)|<img\s+([^>]*\s+)?src="([^"]+)"([^>]*)>')
+
+# 结果加载专用线程池（大 Markdown 读取、图片路径改写、MinIO 上传等重负载）
+# 与默认线程池隔离，避免阻塞上传保存等轻量任务（队头阻塞）
+RESULT_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("API_RESULT_WORKERS", "16")), thread_name_prefix="result-loader"
+)
+
+# 超过该大小的 Markdown 使用 mmap 读取
+MMAP_READ_THRESHOLD = 1 << 20
+
+# 超过该大小（字节）的 Markdown 不进入进程内缓存，避免多进程下缓存整份大文档占用过多内存
+MARKDOWN_CACHE_MAX_FILE_SIZE = int(os.getenv("MARKDOWN_CACHE_MAX_FILE_SIZE", str(4 << 20)))
+
+# MinIO 图片上传并发数
+MINIO_UPLOAD_CONCURRENCY = max(1, int(os.getenv("MINIO_UPLOAD_CONCURRENCY", "16")))
+
+# MinIO 图片上传专用线程池（全局复用，线程按需创建；与 RESULT_EXECUTOR 隔离，避免互相占满后死锁）
+MINIO_UPLOAD_EXECUTOR = ThreadPoolExecutor(max_workers=MINIO_UPLOAD_CONCURRENCY, thread_name_prefix="minio-upload")
+
+# MinIO 预签名 URL 有效期（秒），> 0 时返回预签名 GET URL（私有 bucket 可用），0 表示返回公开 URL
+MINIO_PRESIGNED_EXPIRES = int(os.getenv("MINIO_PRESIGNED_EXPIRES", "0"))
+
+# MinIO 连接/读取超时（秒），默认与 minio 客户端内置值一致，避免 MinIO 卡住时上传线程永久阻塞
+MINIO_TIMEOUT = float(os.getenv("MINIO_TIMEOUT", "300"))
+
+# 粗粒度时间戳（秒级），由后台任务每秒刷新一次
+# 健康检查、队列统计等高频接口直接复用，避免每次请求都格式化当前时间
+_NOW_ISO = datetime.now().isoformat()
+_timestamp_task: Optional[asyncio.Task] = None
+
+
+async def _refresh_timestamp():
+    """每秒刷新一次 _NOW_ISO"""
+    global _NOW_ISO
+    while True:
+        _NOW_ISO = datetime.now().isoformat()
+        await asyncio.sleep(1)
+
+
+@app.on_event("startup")
+async def _start_timestamp_refresher():
+    global _timestamp_task
+    _timestamp_task = asyncio.create_task(_refresh_timestamp())
+
+
+@app.on_event("shutdown")
+async def _stop_timestamp_refresher():
+    if _timestamp_task is not None:
+        _timestamp_task.cancel()
+
+
+def _create_minio_client() -> Optional[Minio]:
+    """
+    创建 MinIO 客户端（模块加载时调用一次，全局复用连接池）
+
+    未配置 MINIO_ENDPOINT 或配置无效时返回 None
+    """
+    if not MINIO_CONFIG["endpoint"]:
+        return None
+    try:
+        return Minio(
+            MINIO_CONFIG["endpoint"],
+            access_key=MINIO_CONFIG["access_key"],
+            secret_key=MINIO_CONFIG["secret_key"],
+            secure=MINIO_CONFIG["secure"],
+            # 连接池大小与上传并发数匹配，复用 TCP/TLS 连接
+            http_client=urllib3.PoolManager(
+                timeout=urllib3.Timeout(connect=MINIO_TIMEOUT, read=MINIO_TIMEOUT),
+                maxsize=max(MINIO_UPLOAD_CONCURRENCY, 10),
+                cert_reqs="CERT_REQUIRED",
+                ca_certs=os.getenv("SSL_CERT_FILE") or certifi.where(),
+                retries=urllib3.Retry(total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+            ),
+        )
+    except Exception as e:
+        logger.error(f"❌ Failed to create MinIO client: {e}")
+        return None
+
+
+_MINIO_CLIENT = _create_minio_client()
+
+
+# 已上传到 MinIO 的图片对象清单（位于任务结果目录，{图片文件名: 对象名}）
+MINIO_OBJECTS_MANIFEST = "result_minio_objects.json"
+
+
+def _minio_object_name(image_path: Path) -> str:
+    """
+    图片在 MinIO 中的对象名（由图片本地路径确定性生成，保留原后缀）
+
+    同一张图片重复上传时覆盖同一对象，不会在 bucket 中不断产生新对象
+    """
+    digest = hashlib.blake2b(os.fspath(image_path).encode(), digest_size=16).hexdigest()
+    return f"images/{digest}{image_path.suffix}"
+
+
+def _minio_object_url(object_name: str) -> str:
+    """MinIO 对象的访问 URL（预签名 URL 在本地计算签名，不访问 MinIO）"""
+    bucket_name = MINIO_CONFIG["bucket_name"]
+    if MINIO_PRESIGNED_EXPIRES > 0:
+        # 预签名 URL：客户端直接从 MinIO 拉取图片，bucket 无需公开（bucket region 查询后由客户端缓存，签名在本地计算）
+        return _MINIO_CLIENT.presigned_get_object(
+            bucket_name, object_name, expires=timedelta(seconds=MINIO_PRESIGNED_EXPIRES)
+        )
+
+    scheme = "https" if MINIO_CONFIG["secure"] else "http"
+    return f"{scheme}://{MINIO_CONFIG['endpoint']}/{bucket_name}/{object_name}"
+
+
+def _upload_image_to_minio(image_path: Path) -> Optional[str]:
+    """
+    上传单张图片到 MinIO
+
+    Returns:
+        对象名，上传失败返回 None
+    """
+    try:
+        object_name = _minio_object_name(image_path)
+        _MINIO_CLIENT.fput_object(MINIO_CONFIG["bucket_name"], object_name, str(image_path))
+        logger.info(f"✅ Uploaded to MinIO: {object_name}")
+        return object_name
+    except Exception as e:
+        logger.error(f"❌ Failed to upload image to MinIO: {e}")
+        return None
+
+
+def _load_minio_manifest(manifest_path: Path) -> dict:
+    """读取已上传图片清单，不存在或损坏时返回空字典"""
+    try:
+        manifest = orjson.loads(manifest_path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _save_minio_manifest(manifest_path: Path, manifest: dict):
+    """原子写入已上传图片清单（先写临时文件再替换，并发请求不会读到半个文件）"""
+    tmp_path = manifest_path.with_name(f"{manifest_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp_path.write_bytes(orjson.dumps(manifest))
+        os.replace(tmp_path, manifest_path)
+    except OSError as e:
+        logger.warning(f"⚠️  Failed to save MinIO manifest: {e}")
+        tmp_path.unlink(missing_ok=True)
+
+
+def _resolve_minio_urls(image_files: set, manifest_path: Path) -> Dict[Path, str]:
+    """
+    获取图片的 MinIO URL：清单中已记录的图片只重新生成 URL（无需上传），其余并发上传后记入清单
+
+    Returns:
+        {本地图片路径: URL}，上传失败的图片不在结果中
+    """
+    manifest = _load_minio_manifest(manifest_path)
+    object_names = {}
+    pending = []
+    for image_file in image_files:
+        object_name = manifest.get(image_file.name)
+        if object_name:
+            object_names[image_file] = object_name
+        else:
+            pending.append(image_file)
+
+    if pending:
+        # 并发上传（minio 客户端为阻塞 I/O）
+        futures = {f: MINIO_UPLOAD_EXECUTOR.submit(_upload_image_to_minio, f) for f in pending}
+        uploaded = {f: future.result() for f, future in futures.items()}
+        uploaded = {f: name for f, name in uploaded.items() if name}
+        if uploaded:
+            object_names.update(uploaded)
+            manifest.update((f.name, name) for f, name in uploaded.items())
+            _save_minio_manifest(manifest_path, manifest)
+
+    return {f: _minio_object_url(name) for f, name in object_names.items()}
+
+
+def _build_static_url_prefix(result_path: str) -> str:
+    """
+    构建本地静态文件服务的图片 URL 前缀（每次处理只计算一次）
+
+    result_path 格式: /app/output/{file_stem}，Worker 已规范化图片目录为 images/
+    转换为: /api/v1/files/output/{file_stem}/images/，再拼接 URL 编码后的图片文件名
+    """
+    # 直接使用字符串替换，避免 Path 对象的编码问题
+    output_dir_str = str(OUTPUT_DIR).replace("\\", "/")  # 统一使用正斜杠
+    result_path_str = result_path.replace("\\", "/")
+
+    if result_path_str.startswith(output_dir_str):
+        # 提取相对路径并进行 URL 编码（safe='/' 保留斜杠）
+        relative_path = result_path_str[len(output_dir_str) :].lstrip("/")
+        return f"/api/v1/files/output/{quote(relative_path, safe='/')}/images/"
+
+    # 如果路径不匹配，尝试直接拼接
+    logger.warning(f"⚠️  result_path doesn't start with OUTPUT_DIR: {result_path}")
+    return "/api/v1/files/output/images/"
 
 
 def process_markdown_images(md_content: str, image_dir: Path, result_path: str, upload_images: bool = False):
@@ -101,6 +335,10 @@ def process_markdown_images(md_content: str, image_dir: Path, result_path: str,
     1. Markdown 语法：![alt](path)
     2. HTML 标签：<img src="path" ...>
 
+    先收集全部图片引用并构建 {原路径: 新 URL} 映射（MinIO 上传并发执行），
+    再统一替换，避免在正则回调中逐张串行上传。
+    已上传过的图片（记录在结果目录的 MINIO_OBJECTS_MANIFEST 中）只重新生成 URL，不重复上传。
+
     Args:
         md_content: Markdown 内容
         image_dir: 图片所在目录（绝对路径，Worker 已规范化为 images/）
@@ -110,120 +348,289 @@ def process_markdown_images(md_content: str, image_dir: Path, result_path: str,
     Returns:
         处理后的 Markdown 内容
     """
+    # 字面量预过滤（C 实现的子串查找）：不含图片引用的文档无需运行正则
+    if "![" not in md_content and "<img" not in md_content:
+        return md_content
+
+    try:
+        # 1. 收集所有图片引用（同一图片可能被多次引用，只处理一次）
+        image_refs = {m.group(2) or m.group(4) for m in IMG_REF_PATTERN.finditer(md_content)}
+
+        local_images = {}
+        for image_path in image_refs:
+            # 构建完整的本地图片路径
+            full_image_path = image_dir / Path(image_path).name
+            logger.debug(f"🔍 Processing image: {image_path} -> {full_image_path}")
+            if not full_image_path.exists():
+                logger.warning(f"⚠️  Image not found: {full_image_path}")
+                continue
+            local_images[image_path] = full_image_path
+
+        # 2. 如果需要上传到 MinIO，获取各图片的 MinIO URL（未上传过的才上传）
+        uploaded_urls = {}
+        if upload_images and local_images:
+            if _MINIO_CLIENT is None:
+                logger.error("❌ MinIO is not configured, falling back to static file URLs")
+            else:
+                uploaded_urls = _resolve_minio_urls(
+                    set(local_images.values()), image_dir.parent / MINIO_OBJECTS_MANIFEST
+                )
+
+        if not local_images:
+            return md_content
+
+        # 上传失败时继续使用本地静态文件服务（URL 前缀只计算一次，逐张只编码文件名）
+        static_url_prefix = _build_static_url_prefix(result_path)
+        url_map = {}
+        for image_path, full_image_path in local_images.items():
+            url_map[image_path] = uploaded_urls.get(full_image_path) or (
+                static_url_prefix + quote(full_image_path.name, safe="/")
+            )
+
+        # 3. 按映射一次性替换所有图片引用（回调中只做字典查找，不做 I/O）
+        def replace_image(match):
+            if match.group(2) is not None:
+                new_url = url_map.get(match.group(2))
+                if new_url:
+                    return f"![{match.group(1)}]({new_url})"
+            else:
+                new_url = url_map.get(match.group(4))
+                if new_url:
+                    # 保持 HTML 格式
+                    return f'<img {match.group(3) or ""}src="{new_url}"{match.group(5) or ""}>'
+            return match.group(0)
+
+        new_content = IMG_REF_PATTERN.sub(replace_image, md_content)
+        return new_content
+    except Exception as e:
+        logger.error(f"❌ Failed to process images: {e}")
+        return md_content
 
-    def process_image_path(image_path: str, alt_text: str = "Image") -> tuple[str, str]:
-        """
-        处理图片路径，返回 (新路径, 格式类型)
 
-        Returns:
-            (new_url, format_type)  format_type: 'markdown' 或 'html'
-        """
-        # 提取图片文件名
-        image_filename = Path(image_path).name
+def _read_text(path: str, size: int) -> str:
+    """
+    读取 UTF-8 文本文件
+
+    大文件使用 mmap 映射后直接解码，省去用户态读循环和中间 bytes 拷贝
+    """
+    with open(path, "rb") as f:
+        if size >= MMAP_READ_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                content = str(mm, "utf-8")
+        else:
+            content = f.read().decode("utf-8")
 
-        # 构建完整的本地图片路径
-        full_image_path = image_dir / image_filename
+    # 与文本模式读取保持一致：统一换行符
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return content
+
+
+@lru_cache(maxsize=int(os.getenv("MARKDOWN_CACHE_SIZE", "32")))
+def _read_text_cached(path: str, mtime_ns: int, size: int) -> str:
+    """
+    读取 UTF-8 文本文件（按 路径+mtime+大小 缓存，文件变化后自动失效）
 
-        logger.debug(f"🔍 Processing image: {image_path} -> {full_image_path}")
+    轮询同一任务时直接命中进程内缓存，无需重复读盘
+    """
+    return _read_text(path, size)
+
+
+def _read_text_file(path: Path) -> str:
+    """
+    读取文本文件内容（带缓存）
+
+    LRU 只限制条目数，超过 MARKDOWN_CACHE_MAX_FILE_SIZE 的文件不进入缓存，
+    每个进程的缓存内存上限约为 条目数 × 单文件上限
+    """
+    st = os.stat(path)
+    if st.st_size > MARKDOWN_CACHE_MAX_FILE_SIZE:
+        return _read_text(str(path), st.st_size)
+    return _read_text_cached(str(path), st.st_mtime_ns, st.st_size)
 
-        if not full_image_path.exists():
-            logger.warning(f"⚠️  Image not found: {full_image_path}")
-            return None, None
 
-        # 如果需要上传到 MinIO
-        if upload_images:
+def _is_minio_cache_valid(cached_md_file: Path) -> bool:
+    """
+    判断 MinIO 版 Markdown 缓存是否可用
+
+    使用预签名 URL 时，缓存中的链接会过期：剩余有效期不足一半时视为失效，重新生成
+    （重新生成时图片已记录在上传清单中，只重新签名，不会重复上传）
+    """
+    try:
+        mtime = cached_md_file.stat().st_mtime
+    except OSError:
+        return False
+    if MINIO_PRESIGNED_EXPIRES <= 0:
+        return True
+    return time.time() - mtime < MINIO_PRESIGNED_EXPIRES / 2
+
+
+def _load_result_data(task: dict, format: str, upload_images: bool):
+    """
+    读取已完成任务的解析结果（同步阻塞，需在线程中调用）
+
+    包含目录遍历、Markdown/JSON 读取、图片路径处理等磁盘 I/O，
+    由 get_task_status 提交到 RESULT_EXECUTOR 执行，避免阻塞事件循环。
+
+    Args:
+        task: 任务记录
+        format: 返回格式 markdown/json/both
+        upload_images: 是否上传图片到 MinIO 并替换链接
+
+    Returns:
+        data 字段内容；结果目录或 Markdown 文件不存在时返回 None
+    """
+    task_id = task["task_id"]
+    data = None
+
+    result_dir = Path(task["result_path"])
+    logger.info(f"📂 Checking result directory: {result_dir}")
+
+    if result_dir.exists():
+        logger.info("✅ Result directory exists")
+        if task.get("markdown_path"):
+            # Worker 完成时已记录产物路径，无需扫描目录
+            artifacts = {
+                "markdown_path": task["markdown_path"],
+                "json_path": task.get("json_path"),
+            }
+        else:
+            # 旧任务没有记录产物路径，回退到递归扫描
+            # （MinerU 输出结构：task_id/filename/auto/*.md，JSON 为 {filename}_content_list.json 等）
+            artifacts = find_result_artifacts(result_dir)
+        md_file = Path(artifacts["markdown_path"]) if artifacts["markdown_path"] else None
+        json_file = Path(artifacts["json_path"]) if artifacts["json_path"] else None
+        logger.info(f"📄 Markdown file: {md_file}, JSON file: {json_file}")
+
+        if md_file:
             try:
-                minio_client = get_minio_client()
-                bucket_name = MINIO_CONFIG["bucket_name"]
-                minio_endpoint = MINIO_CONFIG["endpoint"]
+                # 初始化 data 字段
+                data = {}
 
-                # 获取文件后缀
-                file_extension = full_image_path.suffix
-                # 生成 UUID 作为新文件名
-                new_filename = f"{uuid.uuid4()}{file_extension}"
+                # 标记 JSON 是否可用
+                data["json_available"] = json_file is not None
 
-                # 上传到 MinIO
-                object_name = f"images/{new_filename}"
-                minio_client.fput_object(bucket_name, object_name, str(full_image_path))
+                # 根据 format 参数决定返回内容
+                if format in ["markdown", "both"]:
+                    # 查找图片目录（Worker 已规范化为 images/）
+                    image_dir = md_file.parent / "images"
 
-                # 生成 MinIO 访问 URL
-                scheme = "https" if MINIO_CONFIG["secure"] else "http"
-                minio_url = f"{scheme}://{minio_endpoint}/{bucket_name}/{object_name}"
+                    # 缓存文件路径
+                    cached_md_file = md_file.parent / "result_minio.md" if upload_images else None
+
+                    # 如果请求 MinIO 版本且缓存存在，直接返回缓存
+                    if upload_images and cached_md_file and _is_minio_cache_valid(cached_md_file):
+                        logger.info(f"✅ Found cached MinIO markdown: {cached_md_file.name}")
+                        md_content = _read_text_file(cached_md_file)
+
+                        data["markdown_file"] = cached_md_file.name
+                        data["content"] = md_content
+                        data["images_uploaded"] = True
+                        data["from_cache"] = True
+                    else:
+                        # 读取原始 Markdown 内容
+                        logger.info(f"📖 Reading markdown file: {md_file}")
+                        md_content = _read_text_file(md_file)
+
+                        logger.info(f"✅ Markdown content loaded, length: {len(md_content)} characters")
+
+                        # 处理图片路径
+                        if image_dir.exists():
+                            logger.info(f"🖼️  Processing images for task {task_id}, upload_images={upload_images}")
+                            logger.info(f"   Image directory: {image_dir}")
+                            md_content = process_markdown_images(
+                                md_content, image_dir, task["result_path"], upload_images
+                            )
+
+                            # 如果上传到 MinIO，保存缓存文件
+                            if upload_images and cached_md_file:
+                                try:
+                                    cached_md_file.write_text(md_content, encoding="utf-8")
+                                    logger.info(f"💾 Saved MinIO markdown cache: {cached_md_file.name}")
+                                except Exception as e:
+                                    logger.warning(f"⚠️  Failed to save cache: {e}")
+                        else:
+                            logger.debug("ℹ️  No images directory found (task may not contain images)")
+
+                        # 添加 Markdown 相关字段
+                        data["markdown_file"] = md_file.name
+                        data["content"] = md_content
+                        data["images_uploaded"] = upload_images
+                        data["has_images"] = image_dir.exists() if not upload_images else None
+                        data["from_cache"] = False
+
+                # 如果用户请求 JSON 格式
+                if format in ["json", "both"] and json_file:
+                    logger.info(f"📖 Reading JSON file: {json_file}")
+                    try:
+                        # 先校验再直接嵌入原始 JSON 字节，省去再序列化的开销；
+                        # 文件截断/损坏时 orjson.loads 抛出异常，跳过该字段，保证响应始终是合法 JSON
+                        json_bytes = json_file.read_bytes()
+                        orjson.loads(json_bytes)
+                        json_content = orjson.Fragment(json_bytes)
+                        data["json_file"] = json_file.name
+                        data["json_content"] = json_content
+                        logger.info("✅ JSON content loaded successfully")
+                    except Exception as json_e:
+                        logger.warning(f"⚠️  Failed to load JSON: {json_e}")
+                elif format == "json" and not json_file:
+                    # 用户请求 JSON 但没有 JSON 文件
+                    logger.warning("⚠️  JSON format requested but no JSON file available")
+                    data["message"] = "JSON format not available for this backend"
+
+                # 如果没有返回任何内容，添加提示
+                if not data:
+                    data = None
+                    logger.warning(f"⚠️  No data returned for format: {format}")
+                else:
+                    logger.info(f"✅ Response data field added successfully (format={format})")
 
-                logger.info(f"✅ Uploaded to MinIO: {object_name}")
-                return minio_url, "html"
             except Exception as e:
-                logger.error(f"❌ Failed to upload image to MinIO: {e}")
-                # 上传失败，继续使用本地静态文件服务
+                logger.error(f"❌ Failed to read content: {e}")
+                logger.exception(e)
+                # 读取失败不影响状态查询，只是不返回 data
+                data = None
+        else:
+            logger.warning(f"⚠️  No markdown files found in {result_dir}")
+    else:
+        logger.error(f"❌ Result directory does not exist: {result_dir}")
 
-        # 使用本地静态文件服务
-        # result_path 格式: /app/output/{file_stem}
-        # Worker 已规范化图片目录为: images/
-        # 需要转换为: /api/v1/files/output/{file_stem}/images/xxx.jpg
-        try:
-            # 直接使用字符串替换，避免 Path 对象的编码问题
-            output_dir_str = str(OUTPUT_DIR).replace("\\", "/")  # 统一使用正斜杠
-            result_path_str = result_path.replace("\\", "/")
-
-            if result_path_str.startswith(output_dir_str):
-                # 提取相对路径
-                relative_path = result_path_str[len(output_dir_str) :].lstrip("/")
-                # 对路径进行 URL 编码（safe='/' 保留斜杠）
-                encoded_relative_path = quote(relative_path, safe="/")
-                # 对图片文件名进行 URL 编码
-                encoded_image_filename = quote(image_filename, safe="/")
-                # 构建 API 文件访问 URL（图片目录已规范化为 images/）
-                static_url = f"/api/v1/files/output/{encoded_relative_path}/images/{encoded_image_filename}"
-            else:
-                # 如果路径不匹配，尝试直接拼接
-                logger.warning(f"⚠️  result_path doesn't start with OUTPUT_DIR: {result_path}")
-                encoded_image_filename = quote(image_filename, safe="/")
-                static_url = f"/api/v1/files/output/images/{encoded_image_filename}"
-
-            logger.debug(f"📸 Image URL: {static_url}")
-            return static_url, "markdown"
-        except Exception as e:
-            logger.error(f"❌ Failed to generate static URL: {e}")
-            return None, None
-
-    # 1. 处理 Markdown 格式的图片：![alt](path)
-    md_img_pattern = r"!\[([^\]]*)\]\(([^)]+)\)"
-
-    def replace_md_image(match):
-        alt_text = match.group(1)
-        image_path = match.group(2)
-
-        new_url, _ = process_image_path(image_path, alt_text)
-        if new_url:
-            return f"![{alt_text}]({new_url})"
-        return match.group(0)
-
-    # 2. 处理 HTML img 标签：<img src="path" ...>
-    html_img_pattern = r'<img\s+([^>]*\s+)?src="([^"]+)"([^>]*)>'
-
-    def replace_html_image(match):
-        before_src = match.group(1) or ""
-        image_path = match.group(2)
-        after_src = match.group(3) or ""
-
-        # 尝试提取 alt 属性
-        alt_match = re.search(r'alt="([^"]*)"', before_src + after_src)
-        alt_text = alt_match.group(1) if alt_match else "Image"
-
-        new_url, format_type = process_image_path(image_path, alt_text)
-        if new_url:
-            # 保持 HTML 格式
-            return f'<img {before_src}src="{new_url}"{after_src}>'
-        return match.group(0)
+    return data
 
-    try:
-        # 替换所有图片引用
-        new_content = re.sub(md_img_pattern, replace_md_image, md_content)
-        new_content = re.sub(html_img_pattern, replace_html_image, new_content)
-        return new_content
-    except Exception as e:
-        logger.error(f"❌ Failed to process images: {e}")
-        return md_content
+
+def _save_upload_file(upload_file: UploadFile, dest_path: Path):
+    """
+    将上传文件保存到磁盘（同步阻塞，需在线程中调用）
+
+    UploadFile 底层是 SpooledTemporaryFile：已落盘时使用 os.sendfile 在内核态拷贝；
+    仍在内存中（小文件）或不支持 sendfile 时使用 shutil.copyfileobj 分块拷贝。
+    """
+    src = upload_file.file
+    src.seek(0)
+    # 未落盘的 SpooledTemporaryFile 底层为 BytesIO，对其调用 fileno() 会先写一次临时文件，直接拷贝内存即可
+    in_memory = isinstance(getattr(src, "_file", None), io.BytesIO)
+    with open(dest_path, "wb") as dst:
+        if hasattr(os, "sendfile") and not in_memory:
+            try:
+                src_fd = src.fileno()
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                src_fd = None
+            if src_fd is not None:
+                try:
+                    size = os.fstat(src_fd).st_size
+                    offset = 0
+                    while offset < size:
+                        sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+                        if sent == 0:
+                            break
+                        offset += sent
+                    return
+                except OSError:
+                    # 不支持 sendfile（如特殊文件系统），回退到用户态拷贝
+                    src.seek(0)
+                    dst.seek(0)
+                    dst.truncate()
+        shutil.copyfileobj(src, dst, 1 << 20)
 
 
 @app.get("/", tags=["系统信息"])
@@ -286,16 +693,11 @@ async def submit_task(
         unique_filename = f"{uuid.uuid4().hex}_{file.filename}"
         temp_file_path = upload_dir / unique_filename
 
-        # 流式写入文件到磁盘，避免高内存使用
-        with open(temp_file_path, "wb") as temp_file:
-            while True:
-                chunk = await file.read(1 << 23)  # 8MB chunks
-                if not chunk:
-                    break
-                temp_file.write(chunk)
+        # 在线程中拷贝上传文件到磁盘，避免阻塞事件循环
+        await asyncio.to_thread(_save_upload_file, file, temp_file_path)
 
         # 创建任务 (关联用户)
-        task_id = db.create_task(
+        task_id = await db.acreate_task(
             file_name=file.filename,
             file_path=str(temp_file_path),
             backend=backend,
@@ -347,9 +749,27 @@ async def submit_task(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _task_status_etag(task: dict) -> str:
+    """根据任务记录中会变化的字段计算 ETag（未完成任务的状态响应完全由这些字段决定）"""
+    key = (
+        f"{task['status']}:{task['started_at']}:{task['completed_at']}:{task['retry_count']}:"
+        f"{task['worker_id']}:{task['priority']}:{task['error_message']}"
+    )
+    return f'"{hashlib.blake2b(key.encode(), digest_size=8).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 是否命中 ETag（按逗号拆分为完整实体标签逐个比较，弱比较，支持 *）"""
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
 @app.get("/api/v1/tasks/{task_id}", tags=["任务管理"])
 async def get_task_status(
     task_id: str,
+    request: Request,
     upload_images: bool = Query(False, description="是否上传图片到MinIO并替换链接（仅当任务完成时有效）"),
     format: str = Query("markdown", description="返回格式: markdown(默认)/json/both"),
     current_user: User = Depends(get_current_active_user),
@@ -364,7 +784,7 @@ async def get_task_status(
     - format=both: 同时返回 Markdown 和 JSON
     可选择是否上传图片到 MinIO 并替换为 URL
     """
-    task = db.get_task(task_id)
+    task = await db.aget_task(task_id)
 
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -374,6 +794,15 @@ async def get_task_status(
         if task.get("user_id") != current_user.user_id:
             raise HTTPException(status_code=403, detail="Permission denied: You can only view your own tasks")
 
+    # 未完成任务的轮询：状态未变化时直接返回 304，省去响应构建与序列化
+    # （已完成任务的响应还取决于结果文件，不走该路径）
+    etag = None
+    if task["status"] != "completed":
+        etag = _task_status_etag(task)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
     response = {
         "success": True,
         "task_id": task_id,
@@ -399,133 +828,14 @@ async def get_task_status(
             response["message"] = "Task completed but result files have been cleaned up (older than retention period)"
             return response
 
-        result_dir = Path(task["result_path"])
-        logger.info(f"📂 Checking result directory: {result_dir}")
-
-        if result_dir.exists():
-            logger.info("✅ Result directory exists")
-            # 递归查找 Markdown 文件（MinerU 输出结构：task_id/filename/auto/*.md）
-            md_files = list(result_dir.rglob("*.md"))
-            # 递归查找 JSON 文件
-            # MinerU 输出格式: {filename}_content_list.json (主要的结构化内容)
-            # 也支持其他引擎的: content.json, result.json
-            json_files = [
-                f
-                for f in result_dir.rglob("*.json")
-                if not f.parent.name.startswith("page_")
-                and (f.name in ["content.json", "result.json"] or "_content_list.json" in f.name)
-            ]
-            logger.info(f"📄 Found {len(md_files)} markdown files and {len(json_files)} json files")
-
-            if md_files:
-                try:
-                    # 初始化 data 字段
-                    response["data"] = {}
-
-                    # 标记 JSON 是否可用
-                    response["data"]["json_available"] = len(json_files) > 0
-
-                    # 根据 format 参数决定返回内容
-                    if format in ["markdown", "both"]:
-                        # 选择主 Markdown 文件（优先 result.md）
-                        md_file = None
-                        for f in md_files:
-                            if f.name == "result.md":
-                                md_file = f
-                                break
-                        if not md_file:
-                            md_file = md_files[0]
-
-                        # 查找图片目录（Worker 已规范化为 images/）
-                        image_dir = md_file.parent / "images"
-
-                        # 缓存文件路径
-                        cached_md_file = md_file.parent / "result_minio.md" if upload_images else None
-
-                        # 如果请求 MinIO 版本且缓存存在，直接返回缓存
-                        if upload_images and cached_md_file and cached_md_file.exists():
-                            logger.info(f"✅ Found cached MinIO markdown: {cached_md_file.name}")
-                            with open(cached_md_file, "r", encoding="utf-8") as f:
-                                md_content = f.read()
-
-                            response["data"]["markdown_file"] = cached_md_file.name
-                            response["data"]["content"] = md_content
-                            response["data"]["images_uploaded"] = True
-                            response["data"]["from_cache"] = True
-                        else:
-                            # 读取原始 Markdown 内容
-                            logger.info(f"📖 Reading markdown file: {md_file}")
-                            with open(md_file, "r", encoding="utf-8") as f:
-                                md_content = f.read()
-
-                            logger.info(f"✅ Markdown content loaded, length: {len(md_content)} characters")
-
-                            # 处理图片路径
-                            if image_dir.exists():
-                                logger.info(f"🖼️  Processing images for task {task_id}, upload_images={upload_images}")
-                                logger.info(f"   Image directory: {image_dir}")
-                                md_content = process_markdown_images(
-                                    md_content, image_dir, task["result_path"], upload_images
-                                )
-
-                                # 如果上传到 MinIO，保存缓存文件
-                                if upload_images and cached_md_file:
-                                    try:
-                                        cached_md_file.write_text(md_content, encoding="utf-8")
-                                        logger.info(f"💾 Saved MinIO markdown cache: {cached_md_file.name}")
-                                    except Exception as e:
-                                        logger.warning(f"⚠️  Failed to save cache: {e}")
-                            else:
-                                logger.debug("ℹ️  No images directory found (task may not contain images)")
-
-                            # 添加 Markdown 相关字段
-                            response["data"]["markdown_file"] = md_file.name
-                            response["data"]["content"] = md_content
-                            response["data"]["images_uploaded"] = upload_images
-                            response["data"]["has_images"] = image_dir.exists() if not upload_images else None
-                            response["data"]["from_cache"] = False
-
-                    # 如果用户请求 JSON 格式
-                    if format in ["json", "both"] and json_files:
-                        import json as json_lib
-
-                        json_file = json_files[0]
-                        logger.info(f"📖 Reading JSON file: {json_file}")
-                        try:
-                            with open(json_file, "r", encoding="utf-8") as f:
-                                json_content = json_lib.load(f)
-                            response["data"]["json_file"] = json_file.name
-                            response["data"]["json_content"] = json_content
-                            logger.info("✅ JSON content loaded successfully")
-                        except Exception as json_e:
-                            logger.warning(f"⚠️  Failed to load JSON: {json_e}")
-                    elif format == "json" and not json_files:
-                        # 用户请求 JSON 但没有 JSON 文件
-                        logger.warning("⚠️  JSON format requested but no JSON file available")
-                        response["data"]["message"] = "JSON format not available for this backend"
-
-                    # 如果没有返回任何内容，添加提示
-                    if not response["data"]:
-                        response["data"] = None
-                        logger.warning(f"⚠️  No data returned for format: {format}")
-                    else:
-                        logger.info(f"✅ Response data field added successfully (format={format})")
-
-                except Exception as e:
-                    logger.error(f"❌ Failed to read content: {e}")
-                    logger.exception(e)
-                    # 读取失败不影响状态查询，只是不返回 data
-                    response["data"] = None
-            else:
-                logger.warning(f"⚠️  No markdown files found in {result_dir}")
-        else:
-            logger.error(f"❌ Result directory does not exist: {result_dir}")
-    elif task["status"] == "completed":
-        logger.warning("⚠️  Task completed but result_path is empty")
+        loop = asyncio.get_running_loop()
+        response["data"] = await loop.run_in_executor(RESULT_EXECUTOR, _load_result_data, task, format, upload_images)
     else:
         logger.info(f"ℹ️  Task status is {task['status']}, skipping content loading")
 
-    return response
+    # 直接返回 ORJSONResponse，跳过 jsonable_encoder（json_content 为预序列化的 orjson.Fragment）
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"} if etag else None
+    return ORJSONResponse(content=response, headers=headers)
 
 
 @app.delete("/api/v1/tasks/{task_id}", tags=["任务管理"])
@@ -535,7 +845,7 @@ async def cancel_task(task_id: str, current_user: User = Depends(get_current_act
 
     需要认证。用户只能取消自己的任务，管理员可以取消任何任务。
     """
-    task = db.get_task(task_id)
+    task = await db.aget_task(task_id)
 
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -546,7 +856,7 @@ async def cancel_task(task_id: str, current_user: User = Depends(get_current_act
             raise HTTPException(status_code=403, detail="Permission denied: You can only cancel your own tasks")
 
     if task["status"] == "pending":
-        db.update_task_status(task_id, "cancelled")
+        await db.aupdate_task_status(task_id, "cancelled")
 
         # 删除临时文件
         file_path = Path(task["file_path"])
@@ -566,13 +876,13 @@ async def get_queue_stats(current_user: User = Depends(require_permission(Permis
 
     需要认证和 QUEUE_VIEW 权限。
     """
-    stats = db.get_queue_stats()
+    stats = await db.aget_queue_stats()
 
     return {
         "success": True,
         "stats": stats,
         "total": sum(stats.values()),
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": _NOW_ISO,
         "user": current_user.username,
     }
 
@@ -591,45 +901,12 @@ async def list_tasks(
     # 检查用户权限
     can_view_all = current_user.has_permission(Permission.TASK_VIEW_ALL)
 
-    if can_view_all:
-        # 管理员/经理查看所有任务
-        if status:
-            tasks = db.get_tasks_by_status(status, limit)
-        else:
-            with db.get_cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT * FROM tasks
-                    ORDER BY created_at DESC
-                    LIMIT ?
-                """,
-                    (limit,),
-                )
-                tasks = [dict(row) for row in cursor.fetchall()]
-    else:
-        # 普通用户只能看到自己的任务
-        with db.get_cursor() as cursor:
-            if status:
-                cursor.execute(
-                    """
-                    SELECT * FROM tasks
-                    WHERE user_id = ? AND status = ?
-                    ORDER BY created_at DESC
-                    LIMIT ?
-                """,
-                    (current_user.user_id, status, limit),
-                )
-            else:
-                cursor.execute(
-                    """
-                    SELECT * FROM tasks
-                    WHERE user_id = ?
-                    ORDER BY created_at DESC
-                    LIMIT ?
-                """,
-                    (current_user.user_id, limit),
-                )
-            tasks = [dict(row) for row in cursor.fetchall()]
+    # 管理员/经理查看所有任务，普通用户只能看到自己的任务
+    tasks = await db.alist_tasks(
+        user_id=None if can_view_all else current_user.user_id,
+        status=status,
+        limit=limit,
+    )
 
     return {"success": True, "count": len(tasks), "tasks": tasks, "can_view_all": can_view_all}
 
@@ -649,7 +926,7 @@ async def cleanup_old_tasks(
 
     需要管理员权限。
     """
-    deleted_count = db.cleanup_old_task_records(days)
+    deleted_count = await db.acleanup_old_task_records(days)
 
     logger.info(f"🧹 Cleaned up {deleted_count} old tasks (files and records) by {current_user.username}")
 
@@ -670,7 +947,7 @@ async def reset_stale_tasks(
 
     需要管理员权限。
     """
-    reset_count = db.reset_stale_tasks(timeout_minutes)
+    reset_count = await db.areset_stale_tasks(timeout_minutes)
 
     logger.info(f"🔄 Reset {reset_count} stale tasks by {current_user.username}")
 
@@ -681,12 +958,12 @@ async def reset_stale_tasks(
     }
 
 
-@app.get("/api/v1/engines", tags=["系统信息"])
-async def list_engines():
+@lru_cache(maxsize=1)
+def _build_engines() -> dict:
     """
-    列出所有可用的处理引擎
+    检测系统中可用的处理引擎（结果缓存，进程生命周期内只检测一次）
 
-    无需认证。返回系统中所有可用的处理引擎信息。
+    已安装的引擎在运行期间不会变化，避免每次请求都执行 find_spec 和导入检测
     """
     engines = {
         "document": [
@@ -770,10 +1047,20 @@ async def list_engines():
     except ImportError:
         pass
 
+    return engines
+
+
+@app.get("/api/v1/engines", tags=["系统信息"])
+async def list_engines():
+    """
+    列出所有可用的处理引擎
+
+    无需认证。返回系统中所有可用的处理引擎信息。
+    """
     return {
         "success": True,
-        "engines": engines,
-        "timestamp": datetime.now().isoformat(),
+        "engines": _build_engines(),
+        "timestamp": _NOW_ISO,
     }
 
 
@@ -784,27 +1071,141 @@ async def health_check():
     """
     try:
         # 检查数据库连接
-        stats = db.get_queue_stats()
+        stats = await db.aget_queue_stats()
 
         return {
             "status": "healthy",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _NOW_ISO,
             "database": "connected",
             "queue_stats": stats,
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return JSONResponse(status_code=503, content={"status": "unhealthy", "error": str(e)})
+        return ORJSONResponse(status_code=503, content={"status": "unhealthy", "error": str(e)})
 
 
 # ============================================================================
 # 自定义文件服务（支持 URL 编码的中文路径）
 # ============================================================================
 from urllib.parse import unquote
+from email.utils import formatdate, parsedate_to_datetime
+
+# 输出目录按上传文件名（uuid 前缀）隔离，图片写入后不再变化，允许浏览器/CDN 长期缓存
+OUTPUT_IMAGE_SUFFIXES = frozenset({".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp"})
+OUTPUT_IMAGE_CACHE_CONTROL = os.getenv("OUTPUT_IMAGE_CACHE_CONTROL", "public, max-age=31536000, immutable")
+
+# Nginx 内部 location 前缀（如 /internal/output），设置后输出文件通过 X-Accel-Redirect 交由 Nginx 发送
+# 对应 Nginx 配置：location /internal/output/ { internal; alias <OUTPUT_PATH>/; sendfile on; tcp_nopush on; }
+# 未设置时（本地开发、无 Nginx）由 API 进程直接返回文件
+OUTPUT_ACCEL_REDIRECT_PREFIX = os.getenv("OUTPUT_ACCEL_REDIRECT_PREFIX", "").rstrip("/")
+
+
+class OutputFileResponse(FileResponse):
+    """
+    输出文件响应
+
+    ASGI 服务器声明 http.response.pathsend / http.response.zerocopysend 扩展时（如 Granian、Hypercorn），
+    完整文件由服务器直接发送（sendfile），不经过 Python 层分块读写；
+    否则（uvicorn、Range 请求、HEAD 请求）回退到 FileResponse 的流式发送
+    """
+
+    async def __call__(self, scope, receive, send):
+        self._send_extensions = scope.get("extensions") or {}
+        await super().__call__(scope, receive, send)
+
+    async def _handle_simple(self, send, send_header_only: bool) -> None:
+        if send_header_only:
+            await super()._handle_simple(send, send_header_only)
+        elif "http.response.pathsend" in self._send_extensions:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+        elif "http.response.zerocopysend" in self._send_extensions:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            fd = os.open(self.path, os.O_RDONLY)
+            try:
+                await send({"type": "http.response.zerocopysend", "file": fd, "more_body": False})
+            finally:
+                os.close(fd)
+        else:
+            await super()._handle_simple(send, send_header_only)
+
+
+# 需要走慢路径校验的请求路径：空段（//）、"."、".." 段或 NUL 字符
+_UNSAFE_PATH_PATTERN = re.compile(r"(?:^|/)\.{0,2}(?:/|$)|\x00")
+
+
+@lru_cache(maxsize=4096)
+def _is_output_subdir_cached(dir_path: str, dev: int, ino: int, ctime_ns: int) -> bool:
+    return (os.path.realpath(dir_path) + os.sep).startswith(_OUTPUT_DIR_PREFIX)
+
+
+def _is_output_subdir(dir_path: str) -> bool:
+    """
+    目录真实路径是否位于 OUTPUT_DIR 内（按目录缓存，同一任务目录下的图片只需 realpath 一次）
+
+    缓存键包含目录 lstat 的 (st_dev, st_ino, st_ctime_ns)：目录或其上级被替换为符号链接后
+    键随之变化，重新计算 realpath，不会复用过期的校验结果
+    """
+    try:
+        st = os.lstat(dir_path)
+    except (OSError, ValueError):
+        return False
+    return _is_output_subdir_cached(dir_path, st.st_dev, st.st_ino, st.st_ctime_ns)
+
+
+def _is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """根据 If-None-Match / If-Modified-Since 判断客户端缓存是否仍然有效"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # 存在 If-None-Match 时忽略 If-Modified-Since（RFC 9110）
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _check_output_file(full_path_str: str, fast_path: bool) -> os.stat_result:
+    """
+    校验输出文件（同步阻塞，需在线程中调用）
+
+    Returns:
+        文件的 lstat 结果（复用于 ETag / Last-Modified / Content-Length）
+    """
+    # 安全检查 2：先 lstat（不跟随符号链接）再做其他处理，拒绝符号链接本身；
+    # 同一次 lstat 完成存在性、文件类型检查，结果复用于 ETag / Content-Length
+    try:
+        st = os.lstat(full_path_str)
+    except (FileNotFoundError, NotADirectoryError):
+        logger.warning(f"⚠️  File not found: {full_path_str}")
+        raise HTTPException(status_code=404, detail="File not found")
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="Access denied")
+    except ValueError:
+        raise HTTPException(status_code=403, detail="Invalid path")
+    if stat.S_ISLNK(st.st_mode):
+        raise HTTPException(status_code=403, detail="Symlinks not allowed")
+    if not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=404, detail="Not a file")
+
+    # 安全检查 3：上级目录可能是符号链接，校验其真实路径仍在 OUTPUT_DIR 内
+    # （快路径按目录缓存校验结果，慢路径每次重新计算）
+    parent_dir = os.path.dirname(full_path_str)
+    if fast_path:
+        inside_output_dir = _is_output_subdir(parent_dir)
+    else:
+        inside_output_dir = (os.path.realpath(parent_dir) + os.sep).startswith(_OUTPUT_DIR_PREFIX)
+    if not inside_output_dir:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return st
 
 
 @app.get("/v1/files/output/{file_path:path}", tags=["文件服务"])
-async def serve_output_file(file_path: str):
+async def serve_output_file(file_path: str, request: Request):
     """
     提供输出文件的访问服务
 
@@ -817,28 +1218,59 @@ async def serve_output_file(file_path: str):
         decoded_path = unquote(file_path)
         logger.debug(f"📝 Decoded path: {decoded_path}")
         # 构建完整路径
-        full_path = OUTPUT_DIR / decoded_path
-        logger.debug(f"📂 Full path: {full_path}")
-
-        # 安全检查：确保路径在 OUTPUT_DIR 内
-        try:
-            full_path = full_path.resolve()
-            OUTPUT_DIR.resolve()
-            if not str(full_path).startswith(str(OUTPUT_DIR.resolve())):
-                raise HTTPException(status_code=403, detail="Access denied")
-        except Exception:
-            raise HTTPException(status_code=403, detail="Invalid path")
-
-        # 检查文件是否存在
-        if not full_path.exists():
-            logger.warning(f"⚠️  File not found: {full_path}")
-            raise HTTPException(status_code=404, detail="File not found")
-
-        if not full_path.is_file():
-            raise HTTPException(status_code=404, detail="Not a file")
-
-        # 返回文件
-        return FileResponse(path=str(full_path), media_type="application/octet-stream", filename=full_path.name)
+        # 快路径：前端请求的路径形如 {file_stem}/images/xxx.jpg，不含 //、.、.. 段，直接拼接即为规范路径
+        fast_path = _UNSAFE_PATH_PATTERN.search(decoded_path) is None
+        if fast_path:
+            full_path_str = _OUTPUT_DIR_PREFIX + decoded_path
+        else:
+            logger.debug(f"🐢 Slow path validation for file request: {decoded_path!r}")
+            # 词法规范化（无系统调用）
+            full_path_str = os.path.normpath(_OUTPUT_DIR_PREFIX + decoded_path)
+        logger.debug(f"📂 Full path: {full_path_str}")
+
+        # 安全检查 1：规范化后必须仍位于 OUTPUT_DIR 内（拒绝 ../ 穿越）
+        if not full_path_str.startswith(_OUTPUT_DIR_PREFIX):
+            raise HTTPException(status_code=403, detail="Access denied")
+
+        # 安全检查 2、3 涉及文件系统调用，放到线程中执行，避免慢速文件系统（NFS 等）阻塞事件循环
+        st = await asyncio.to_thread(_check_output_file, full_path_str, fast_path)
+        full_path = Path(full_path_str)
+
+        # 缓存校验：输出文件生成后不再变化，客户端缓存有效时返回 304，不再发送文件内容
+        etag = f'W/"{st.st_size:x}-{st.st_mtime_ns:x}"'
+        last_modified = formatdate(st.st_mtime, usegmt=True)
+
+        if full_path.suffix.lower() in OUTPUT_IMAGE_SUFFIXES:
+            # 图片按实际类型内联返回，并附带长期缓存头，重复访问由浏览器/CDN 命中
+            media_type = mimetypes.guess_type(full_path.name)[0] or "application/octet-stream"
+            disposition_type = "inline"
+            headers = {"Cache-Control": OUTPUT_IMAGE_CACHE_CONTROL}
+        else:
+            media_type = "application/octet-stream"
+            disposition_type = "attachment"
+            headers = {}
+        headers["ETag"] = etag
+        headers["Last-Modified"] = last_modified
+
+        if _is_not_modified(request, etag, st.st_mtime):
+            return Response(status_code=304, headers=headers)
+
+        if OUTPUT_ACCEL_REDIRECT_PREFIX:
+            # 交由 Nginx 直接发送文件（sendfile），API 进程只返回响应头
+            relative_path = full_path.relative_to(_OUTPUT_DIR_RESOLVED).as_posix()
+            headers["X-Accel-Redirect"] = f"{OUTPUT_ACCEL_REDIRECT_PREFIX}/{quote(relative_path)}"
+            headers["Content-Disposition"] = f"{disposition_type}; filename*=utf-8''{quote(full_path.name)}"
+            return Response(media_type=media_type, headers=headers)
+
+        # 返回文件（服务器支持时零拷贝发送，否则基于文件路径流式发送，不把整个文件读入内存）
+        return OutputFileResponse(
+            path=str(full_path),
+            media_type=media_type,
+            filename=full_path.name,
+            content_disposition_type=disposition_type,
+            headers=headers,
+            stat_result=st,
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -857,4 +1289,27 @@ if __name__ == "__main__":
     logger.info("🚀 Starting MinerU Tianshu API Server...")
     logger.info(f"📖 API Documentation: http://localhost:{api_port}/docs")
 
-    uvicorn.run(app, host="0.0.0.0", port=api_port, log_level="info")
+    # uvloop + httptools（uvicorn[standard]）：事件循环与 HTTP 解析走 C 实现
+    # Windows 等未安装时回退到 uvicorn 默认实现
+    import importlib.util
+
+    loop_impl = "uvloop" if importlib.util.find_spec("uvloop") is not None else "auto"
+    http_impl = "httptools" if importlib.util.find_spec("httptools") is not None else "auto"
+
+    # 多进程：API_WORKERS > 1 时由 uvicorn 启动多个 worker 进程共享监听 socket，
+    # JSON 序列化、图片路径改写、JWT 验证等 CPU 工作不再受单进程 GIL 限制
+    # （多进程需以导入字符串形式传入 app；认证缓存、Markdown 缓存为进程内缓存）
+    api_workers = int(os.getenv("API_WORKERS", "1"))
+    if api_workers > 1:
+        logger.info(f"👥 API workers: {api_workers}")
+
+    uvicorn.run(
+        "api_server:app" if api_workers > 1 else app,
+        host="0.0.0.0",
+        port=api_port,
+        log_level="info",
+        loop=loop_impl,
+        http=http_impl,
+        access_log=False,
+        workers=api_workers,
+    )
@@ -10,8 +10,8 @@ import hashlib
 import secrets
 import uuid
 from contextlib import contextmanager
-from typing import Optional, List, Dict
-from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Tuple
+from datetime import datetime, timedelta, timezone
 from loguru import logger
 
 from .models import User, UserCreate, UserRole
@@ -135,15 +135,17 @@ class AuthDB:
                 admin_password = "admin123"  # 默认密码，生产环境应该修改
                 password_hash = self._hash_password(admin_password)
 
+                # OR IGNORE: 多个 API worker 进程同时初始化时，只有一个能创建成功
                 cursor.execute(
                     """
-                    INSERT INTO users (user_id, username, email, password_hash, full_name, role)
+                    INSERT OR IGNORE INTO users (user_id, username, email, password_hash, full_name, role)
                     VALUES (?, ?, ?, ?, ?, ?)
                 """,
                     (admin_id, "admin", "admin@example.com", password_hash, "System Administrator", "admin"),
                 )
-                logger.warning(f"🔐 Created default admin account: admin / {admin_password}")
-                logger.warning("⚠️  Please change the default password immediately!")
+                if cursor.rowcount == 1:
+                    logger.warning(f"🔐 Created default admin account: admin / {admin_password}")
+                    logger.warning("⚠️  Please change the default password immediately!")
 
     @staticmethod
     def _hash_password(password: str) -> str:
@@ -392,6 +394,19 @@ class AuthDB:
         Returns:
             User: 用户对象，验证失败返回 None
         """
+        result = self.verify_api_key_with_expiry(api_key)
+        return result[0] if result else None
+
+    def verify_api_key_with_expiry(self, api_key: str) -> Optional[Tuple[User, Optional[float]]]:
+        """
+        验证 API Key 并返回关联用户及 Key 的过期时间
+
+        Args:
+            api_key: API Key
+
+        Returns:
+            (User, expires_at): 用户对象和过期时间 (Unix 时间戳, 永不过期为 None)，验证失败返回 None
+        """
         api_key_hash = hashlib.sha256(api_key.encode()).hexdigest()
         prefix = api_key[:10]
 
@@ -413,7 +428,16 @@ class AuthDB:
             # 更新最后使用时间
             cursor.execute("UPDATE api_keys SET last_used = CURRENT_TIMESTAMP WHERE key_id = ?", (row["key_id"],))
 
-            return self._row_to_user(row)
+            expires_at = row["expires_at"]
+            if expires_at is not None:
+                if isinstance(expires_at, str):
+                    expires_at = datetime.fromisoformat(expires_at)
+                # 数据库中统一存储 UTC 时间（无时区信息）
+                if expires_at.tzinfo is None:
+                    expires_at = expires_at.replace(tzinfo=timezone.utc)
+                expires_at = expires_at.timestamp()
+
+            return self._row_to_user(row), expires_at
 
     def list_api_keys(self, user_id: str) -> List[Dict]:
         """列出用户的所有 API Key"""
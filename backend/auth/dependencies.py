@@ -5,9 +5,13 @@ MinerU Tianshu - Authentication Dependencies
 FastAPI 依赖项,用于保护路由和验证用户权限
 """
 
+import os
+import time
+import hashlib
+import threading
 from fastapi import Depends, HTTPException, status, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, APIKeyHeader
-from typing import Optional
+from typing import Optional, Dict, Tuple
 
 from .auth_db import AuthDB
 from .jwt_handler import verify_token
@@ -21,6 +25,78 @@ api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 _auth_db: Optional[AuthDB] = None
 
 
+class _AuthCache:
+    """
+    认证结果缓存 (凭证哈希 -> User, 带 TTL)
+
+    轮询类客户端 (如每秒多次查询任务状态) 会反复携带相同的 Token/API Key,
+    缓存已验证的用户, 避免每次请求都验签并查询 AuthDB。
+    条目有效期不超过凭证自身的过期时间 (JWT exp / API Key expires_at), 过期凭证不会因命中缓存而继续可用。
+
+    注意: 缓存仅在当前进程内有效, clear() 也只清空当前进程。API_WORKERS > 1 时,
+    在某个 worker 中禁用用户/删除 API Key, 其他 worker 最多延迟 TTL 秒才生效,
+    因此多进程部署默认使用更短的 TTL。
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: Dict[str, Tuple[float, User]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(kind: str, credential: str) -> str:
+        return hashlib.sha256(f"{kind}:{credential}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[User]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            with self._lock:
+                self._data.pop(key, None)
+            return None
+        return user
+
+    def set(self, key: str, user: User, not_after: Optional[float] = None):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            user: 已验证的用户
+            not_after: 凭证过期时间 (Unix 时间戳), 条目不会在此之后命中
+        """
+        ttl = self.ttl
+        if not_after is not None:
+            ttl = min(ttl, not_after - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            # 超出容量时淘汰最早写入的条目
+            while len(self._data) >= self.maxsize:
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + ttl, user)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# 缓存有效期 (秒): 用户被禁用/角色变更最多延迟该时间生效 (本进程内的修改会立即失效缓存)
+# 多 worker 时其他进程的缓存无法被清空, 默认缩短为 5 秒
+_auth_cache = _AuthCache(
+    ttl=float(os.getenv("AUTH_CACHE_TTL", "30" if int(os.getenv("API_WORKERS", "1")) <= 1 else "5")),
+    maxsize=int(os.getenv("AUTH_CACHE_MAXSIZE", "10000")),
+)
+
+
+def clear_auth_cache():
+    """清空认证缓存 (用户信息、状态或 API Key 变更后调用, 仅作用于当前进程)"""
+    _auth_cache.clear()
+
+
 def get_auth_db() -> AuthDB:
     """获取 AuthDB 实例 (单例模式)"""
     global _auth_db
@@ -47,12 +123,19 @@ async def get_current_user_from_token(
         return None
 
     token = credentials.credentials
+    cache_key = _AuthCache.make_key("bearer", token)
+    user = _auth_cache.get(cache_key)
+    if user is not None:
+        return user
+
     token_data = verify_token(token)
 
     if not token_data:
         return None
 
     user = auth_db.get_user_by_id(token_data.user_id)
+    if user is not None:
+        _auth_cache.set(cache_key, user, not_after=token_data.exp)
     return user
 
 
@@ -73,7 +156,17 @@ async def get_current_user_from_apikey(
     if not api_key:
         return None
 
-    user = auth_db.verify_api_key(api_key)
+    cache_key = _AuthCache.make_key("apikey", api_key)
+    user = _auth_cache.get(cache_key)
+    if user is not None:
+        return user
+
+    # 注意: 命中缓存时不会更新 API Key 的 last_used
+    result = auth_db.verify_api_key_with_expiry(api_key)
+    if result is None:
+        return None
+    user, expires_at = result
+    _auth_cache.set(cache_key, user, not_after=expires_at)
     return user
 
 
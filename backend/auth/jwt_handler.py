@@ -68,7 +68,7 @@ def verify_token(token: str) -> Optional[TokenData]:
         if user_id is None or username is None or role_str is None:
             return None
 
-        return TokenData(user_id=user_id, username=username, role=UserRole(role_str))
+        return TokenData(user_id=user_id, username=username, role=UserRole(role_str), exp=payload.get("exp"))
 
     except jwt.ExpiredSignatureError:
         logger.debug("Token expired")
@@ -149,6 +149,7 @@ class TokenData(BaseModel):
     user_id: str
     username: str
     role: UserRole
+    exp: Optional[int] = None  # 过期时间 (Unix 时间戳)
 
 
 class APIKey(BaseModel):
@@ -28,6 +28,7 @@ from .dependencies import (
     get_auth_db,
     get_current_active_user,
     require_permission,
+    clear_auth_cache,
 )
 from .sso import get_sso_config, create_sso_provider, OIDC_AVAILABLE
 from .system_config import SystemConfig
@@ -118,6 +119,7 @@ async def update_current_user(
 
     if not success:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Failed to update user")
+    clear_auth_cache()
 
     updated_user = auth_db.get_user_by_id(current_user.user_id)
     logger.info(f"✅ User updated: {updated_user.username}")
@@ -219,6 +221,7 @@ async def delete_api_key(
 
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="API Key not found")
+    clear_auth_cache()
 
     logger.info(f"✅ API Key deleted: {key_id} by user {current_user.username}")
     return {"success": True, "message": "API Key deleted successfully"}
@@ -286,6 +289,7 @@ async def update_user(
 
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    clear_auth_cache()
 
     updated_user = auth_db.get_user_by_id(user_id)
     logger.info(f"✅ User updated by admin: {updated_user.username}")
@@ -310,6 +314,7 @@ async def delete_user(
 
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    clear_auth_cache()
 
     logger.info(f"✅ User deleted by admin: {user_id}")
     return {"success": True, "message": "User deleted successfully"}
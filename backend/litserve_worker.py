@@ -23,7 +23,7 @@ import multiprocessing
 # Completely disable LitServe's internal MCP to avoid conflicts with our standalone MCP Server
 import litserve as ls
 from litserve.connector import check_cuda_with_nvidia_smi
-from utils import parse_list_arg
+from utils import parse_list_arg, find_result_artifacts
 
 try:
     # Patch LitServe's MCP module to disable it completely
@@ -449,6 +449,7 @@ class MinerUWorkerAPI(ls.LitAPI):
         loop_count = 0
         last_stats_log = 0
         stats_log_interval = 20  # 每20次循环输出一次统计信息（约10秒）
+        release_memory_pending = False  # 处理过任务后，队列空闲时释放一次引擎显存缓存
 
         while self.running:
             try:
@@ -473,8 +474,13 @@ class MinerUWorkerAPI(ls.LitAPI):
                         logger.exception(e)
                     finally:
                         self.current_task_id = None
+                        release_memory_pending = True
                 else:
                     # 没有任务，空闲等待
+                    if release_memory_pending:
+                        self._release_idle_memory()
+                        release_memory_pending = False
+
                     # 定期输出统计信息以便诊断
                     if loop_count - last_stats_log >= stats_log_interval:
                         try:
@@ -506,6 +512,19 @@ class MinerUWorkerAPI(ls.LitAPI):
                 logger.exception(e)
                 time.sleep(self.poll_interval)
 
+    def _release_idle_memory(self):
+        """
+        队列空闲时释放引擎缓存的显存
+
+        连续处理任务期间引擎不主动释放 CUDA 缓存（避免反复释放后重新分配），
+        在队列转为空闲时统一释放一次
+        """
+        if self.paddleocr_vl_vllm_engine is not None:
+            try:
+                self.paddleocr_vl_vllm_engine.release_memory()
+            except Exception as e:
+                logger.debug(f"Idle memory release warning: {e}")
+
     def _process_task(self, task: dict):
         """
         处理单个任务
@@ -678,6 +697,7 @@ class MinerUWorkerAPI(ls.LitAPI):
                 result_path=result["result_path"],
                 error_message=None,
             )
+            self._save_result_artifacts(task_id, result["result_path"])
 
             # 如果是子任务,检查是否需要触发合并
             if parent_task_id:
@@ -916,15 +936,13 @@ class MinerUWorkerAPI(ls.LitAPI):
                 "Please use 'mineru' or 'markitdown' backend instead."
             )
 
-        # 延迟加载 PaddleOCR-VL（单例模式）
+        # 延迟加载 PaddleOCR-VL（进程内共享实例）
         if self.paddleocr_vl_vllm_engine is None:
-            from paddleocr_vl_vllm import PaddleOCRVLVLLMEngine
+            from paddleocr_vl_vllm import get_engine
 
             # 注意：由于在 setup() 中已设置 CUDA_VISIBLE_DEVICES，
             # 该进程只能看到一个 GPU（映射为 cuda:0）
-            self.paddleocr_vl_vllm_engine = PaddleOCRVLVLLMEngine(
-                device="cuda:0", vllm_api_base=self.paddleocr_vl_vllm_api
-            )
+            self.paddleocr_vl_vllm_engine = get_engine(device="cuda:0", vllm_api_base=self.paddleocr_vl_vllm_api)
             gpu_id = os.environ.get("CUDA_VISIBLE_DEVICES", "?")
             logger.info(f"✅ PaddleOCR-VL VLLM engine loaded on cuda:0 (physical GPU {gpu_id})")
 
@@ -934,7 +952,7 @@ class MinerUWorkerAPI(ls.LitAPI):
 
         # 处理文件（parse 方法需要 output_path）
         # [修改] 关键：解包 options，将前端传来的参数全部传递给 parse 方法，支持高级功能
-        result = self.paddleocr_vl_vllm_engine.parse(
+        self.paddleocr_vl_vllm_engine.parse(
             file_path, 
             output_path=str(output_dir),
             **options
@@ -943,8 +961,8 @@ class MinerUWorkerAPI(ls.LitAPI):
         # 规范化输出（统一文件名和目录结构）
         normalize_output(output_dir, handle_method="paddleocr-vl")
 
-        # 返回结果
-        return {"result_path": str(output_dir), "content": result.get("markdown", "")}
+        # 返回结果（parse 只返回文件路径摘要，Markdown 已写入 result_path，不再回传全文）
+        return {"result_path": str(output_dir)}
 
     def _process_audio(self, file_path: str, options: dict) -> dict:
         """使用 SenseVoice 处理音频文件"""
@@ -1104,7 +1122,7 @@ class MinerUWorkerAPI(ls.LitAPI):
         Returns:
             bool: True 表示已拆分，False 表示不需要拆分
         """
-        from utils.pdf_utils import get_pdf_page_count, split_pdf_file
+        from utils.pdf_utils import get_pdf_page_count, open_pdf, split_pdf_file
 
         # 读取配置
         pdf_split_enabled = os.getenv("PDF_SPLIT_ENABLED", "true").lower() == "true"
@@ -1114,9 +1132,12 @@ class MinerUWorkerAPI(ls.LitAPI):
         pdf_split_threshold = int(os.getenv("PDF_SPLIT_THRESHOLD_PAGES", "500"))
         pdf_split_chunk_size = int(os.getenv("PDF_SPLIT_CHUNK_SIZE", "500"))
 
+        # 源文档只在 读取页数 → 拆分 期间打开（拆分复用同一文档），结束或不需要拆分时关闭
+        doc = None
         try:
             # 快速读取 PDF 页数（只读元数据）
-            page_count = get_pdf_page_count(Path(file_path))
+            doc = open_pdf(file_path)
+            page_count = get_pdf_page_count(Path(file_path), doc=doc)
             logger.info(f"📄 PDF has {page_count} pages (threshold: {pdf_split_threshold})")
 
             # 判断是否需要拆分
@@ -1139,6 +1160,7 @@ class MinerUWorkerAPI(ls.LitAPI):
                 output_dir=split_dir,
                 chunk_size=pdf_split_chunk_size,
                 parent_task_id=task_id,
+                doc=doc,
             )
 
             logger.info(f"✂️  PDF split into {len(chunks)} chunks")
@@ -1183,6 +1205,22 @@ class MinerUWorkerAPI(ls.LitAPI):
             logger.error(f"❌ Failed to split PDF: {e}")
             logger.warning("⚠️  Falling back to processing as single task")
             return False
+        finally:
+            if doc is not None:
+                doc.close()
+
+    def _save_result_artifacts(self, task_id: str, result_path: str):
+        """
+        记录任务结果产物路径，供 API 直接读取（失败不影响任务状态）
+
+        Args:
+            task_id: 任务ID
+            result_path: 任务结果目录
+        """
+        try:
+            self.task_db.set_task_artifacts(task_id, **find_result_artifacts(Path(result_path)))
+        except Exception as e:
+            logger.warning(f"⚠️  Failed to save result artifacts for task {task_id}: {e}")
 
     def _merge_parent_task_results(self, parent_task_id: str):
         """
@@ -1295,6 +1333,7 @@ class MinerUWorkerAPI(ls.LitAPI):
             self.task_db.update_task_status(
                 task_id=parent_task_id, status="completed", result_path=str(parent_output_dir)
             )
+            self._save_result_artifacts(parent_task_id, str(parent_output_dir))
 
             logger.info(f"✅ Parent task {parent_task_id} merged successfully")
 
@@ -1512,6 +1551,13 @@ class MinerUWorkerAPI(ls.LitAPI):
         if hasattr(self, "worker_thread") and self.worker_thread.is_alive():
             self.worker_thread.join(timeout=5)
 
+        # 关闭 PaddleOCR-VL-VLLM 引擎的子进程保存池（如已启用）
+        if getattr(self, "paddleocr_vl_vllm_engine", None) is not None:
+            try:
+                self.paddleocr_vl_vllm_engine.shutdown()
+            except Exception as e:
+                logger.debug(f"PaddleOCR-VL-VLLM engine shutdown warning: {e}")
+
         logger.info(f"✅ Worker {worker_id} stopped")
 
 
@@ -1,17 +1,110 @@
 """
 PaddleOCR-VL-VLLM 解析引擎 (全功能版)
-单例模式，每个进程只加载一次基础版面识别模型,OCR部分调用配置的API
+通过 get_engine() 获取进程内共享实例，每个进程只加载一次基础版面识别模型,OCR部分调用配置的API
 使用最新的 PaddleOCR-VL-VLLM API（自动多语言识别）
 
 参考文档：https://www.paddleocr.ai/latest/version3.x/pipeline_usage/PaddleOCR-VL.html#322-python-api
 """
 
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from threading import Lock
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from types import MappingProxyType
 from loguru import logger
-import json
+import orjson
+import io
 import os
+import gc
+import multiprocessing
+
+
+# predict 默认参数（与官网 API 默认行为一致），模块加载时构造一次，只读
+_PREDICT_DEFAULTS = MappingProxyType(
+    {
+        # --- 图像矫正 & 预处理 ---
+        "use_doc_orientation_classify": False,
+        "use_doc_unwarping": False,
+        "min_pixels": 147384,
+        "max_pixels": 2822400,
+        # --- 版面分析 & 识别功能 ---
+        "use_layout_detection": True,
+        "use_chart_recognition": False,
+        "use_seal_recognition": False,
+        "use_ocr_for_image_block": False,
+        # --- 高级设置 ---
+        "layout_shape_mode": "auto",  # auto, rect, quad, poly
+        "layout_nms": True,
+        "prompt_label": None,  # 仅当 use_layout_detection=False 时生效
+        # --- VLLM 生成参数 ---
+        "repetition_penalty": 1.0,
+        "temperature": 0.0,
+        "top_p": 1.0,
+        # --- 辅助内容过滤 (Markdown忽略标签) ---
+        # 默认忽略：页码(number), 脚注(footnote), 页眉(header), 页脚(footer)等
+        "markdown_ignore_labels": (
+            "number",
+            "footnote",
+            "header",
+            "header_image",
+            "footer",
+            "footer_image",
+            "aside_text",
+        ),
+    }
+)
+_ALLOWED_PREDICT_KEYS = frozenset(_PREDICT_DEFAULTS)
+
+# 每次解析后是否执行 gc.collect()（引用计数已能及时释放页面结果，通常无需全堆扫描）
+_GC_AFTER_PARSE = os.getenv("PADDLEOCR_VL_GC_AFTER_PARSE", "false").lower() == "true"
+
+# 解析后 PaddlePaddle 预留显存超过总显存的该比例时才释放 CUDA 缓存
+_EMPTY_CACHE_RESERVED_RATIO = float(os.getenv("PADDLEOCR_VL_EMPTY_CACHE_RATIO", "0.8"))
+
+# 逐页结果保存的并发线程数（各页写入独立子目录，互不依赖）
+_PAGE_SAVE_WORKERS = int(os.getenv("PADDLEOCR_VL_SAVE_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# 逐页结果保存改用子进程池执行（序列化不占用主进程 GIL；页面结果需可 pickle，默认关闭）
+_SAVE_IN_PROCESS = os.getenv("PADDLEOCR_VL_SAVE_IN_PROCESS", "false").lower() == "true"
+_SAVE_PROCESS_WORKERS = int(os.getenv("PADDLEOCR_VL_SAVE_PROCESSES", "2"))
+
+
+@lru_cache(maxsize=1)
+def _import_paddle() -> Tuple[Any, Any]:
+    """
+    导入 PaddlePaddle 和 PaddleOCRVL（首次调用时导入一次，之后复用缓存结果）
+
+    不在模块加载时导入：CUDA / libpaddle 安装异常时导入会抛出 OSError、RuntimeError 等非 ImportError 异常，
+    不应让 Worker 在导入本模块时即失败；spawn 启动的保存子进程导入本模块时也无需加载 paddle
+
+    Returns:
+        (paddle, PaddleOCRVL)，导入失败的项为 None
+    """
+    try:
+        import paddle
+    except Exception as e:
+        logger.warning(f"⚠️  PaddlePaddle 导入失败: {type(e).__name__}: {e}")
+        paddle = None
+
+    try:
+        from paddleocr import PaddleOCRVL
+    except Exception as e:
+        logger.warning(f"⚠️  PaddleOCR 导入失败: {type(e).__name__}: {e}")
+        PaddleOCRVL = None
+
+    return paddle, PaddleOCRVL
+
+
+def _write_file_bytes(path, data: bytes):
+    """以 os.open + os.write 一次性写入整份字节（绕过缓冲写入器的分块拷贝）"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
 
 
 class PaddleOCRVLVLLMEngine:
@@ -19,7 +112,7 @@ class PaddleOCRVLVLLMEngine:
     PaddleOCR-VL-VLLM 解析引擎（新版本）
 
     特性：
-    - 单例模式（每个进程只加载一次模型）
+    - 进程内共享实例（通过 get_engine() 获取，每个进程只加载一次模型）
     - 自动多语言识别（无需指定语言，支持 109+ 语言）
     - 线程安全
     - 仅支持 GPU 推理（不支持 CPU）
@@ -32,55 +125,34 @@ class PaddleOCRVLVLLMEngine:
     - 推荐：RTX 3090, RTX 4090, A10, A100, H100
     """
 
-    _instance: Optional["PaddleOCRVLVLLMEngine"] = None
-    _lock = Lock()
-    _pipeline = None
-    _initialized = False
-
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-        return cls._instance
-
     def __init__(self, device: str = "cuda:0", vllm_api_base: str = "http://localhost:17300/v1"):
         """
-        初始化引擎（只执行一次）
+        初始化引擎（仅记录配置，不触碰 GPU；GPU 检查和管道加载延迟到首次 parse）
 
         Args:
             device: 设备 (cuda:0, cuda:1 等，PaddleOCR 仅支持 GPU)
             vllm_api_base: VLLM API 基础 URL (默认: http://localhost:17300/v1)
         """
-        if self._initialized:
-            return
-
-        with self._lock:
-            if self._initialized:
-                return
-
-            self.device = device  # 保存 device 参数
-            self.vllm_api_base = vllm_api_base  # 保存 vllm_api_base 参数
-
-            # 从 device 字符串中提取 GPU ID (例如 "cuda:0" -> 0)
-            if "cuda:" in device:
-                self.gpu_id = int(device.split(":")[-1])
-            else:
-                self.gpu_id = 0
-                logger.warning(f"⚠️  Invalid device format: {device}, using GPU 0")
-
-            # 检查 GPU 可用性（PaddleOCR-VL 仅支持 GPU）
-            self._check_gpu_availability()
-
-            self._initialized = True
-
-            logger.info("🔧 PaddleOCR-VL-VLLM Engine initialized")
-            logger.info(f"   Device: {self.device} (GPU ID: {self.gpu_id})")
-            logger.info(f"   VLLM API Base: {self.vllm_api_base}")
-            logger.info("   Model: PaddlePaddle/PaddleOCR-VL (auto-managed)")
-            logger.info("   Auto Multi-Language: Enabled (109+ languages)")
-            logger.info("   GPU Only: CPU not supported")
-            logger.info("   Model Cache: ~/.paddleocr/models/ (auto-managed)")
+        self.device = device  # 保存 device 参数
+        self.vllm_api_base = vllm_api_base  # 保存 vllm_api_base 参数
+        self._pipeline = None
+        self._lock = Lock()
+        self._save_pool = None  # 子进程保存池（PADDLEOCR_VL_SAVE_IN_PROCESS=true 时延迟创建）
+
+        # 从 device 字符串中提取 GPU ID (例如 "cuda:0" -> 0)
+        if "cuda:" in device:
+            self.gpu_id = int(device.split(":")[-1])
+        else:
+            self.gpu_id = 0
+            logger.warning(f"⚠️  Invalid device format: {device}, using GPU 0")
+
+        logger.info("🔧 PaddleOCR-VL-VLLM Engine initialized")
+        logger.info(f"   Device: {self.device} (GPU ID: {self.gpu_id})")
+        logger.info(f"   VLLM API Base: {self.vllm_api_base}")
+        logger.info("   Model: PaddlePaddle/PaddleOCR-VL (auto-managed)")
+        logger.info("   Auto Multi-Language: Enabled (109+ languages)")
+        logger.info("   GPU Only: CPU not supported")
+        logger.info("   Model Cache: ~/.paddleocr/models/ (auto-managed)")
 
     def _check_gpu_availability(self):
         """
@@ -88,7 +160,9 @@ class PaddleOCRVLVLLMEngine:
         PaddleOCR-VL 仅支持 GPU 推理，但不阻止低版本 GPU 运行
         """
         try:
-            import paddle
+            paddle, _ = _import_paddle()
+            if paddle is None:
+                raise ImportError("paddle")
 
             # 检查是否编译了 CUDA 支持
             if not paddle.is_compiled_with_cuda():
@@ -131,9 +205,14 @@ class PaddleOCRVLVLLMEngine:
 
     def _load_pipeline(self):
         """延迟加载 PaddleOCR-VL-VLLM 管道"""
+        # 热路径：无锁读取一次属性即返回。_pipeline 仅在 PaddleOCRVL 构造完成后才被赋值，
+        # 读到非 None 即为可用实例；锁只在首次加载（及并发首次加载的竞争）时获取
         if self._pipeline is not None:
             return self._pipeline
 
+        # 导入放在锁外（首次导入耗时较长，结果已缓存）
+        paddle, PaddleOCRVL = _import_paddle()
+
         with self._lock:
             if self._pipeline is not None:
                 return self._pipeline
@@ -142,9 +221,12 @@ class PaddleOCRVLVLLMEngine:
             logger.info("📥 Loading PaddleOCR-VL-VLLM Pipeline into memory...")
             logger.info("=" * 60)
 
+            # 检查 GPU 可用性（PaddleOCR-VL 仅支持 GPU）
+            self._check_gpu_availability()
+
             try:
-                import paddle
-                from paddleocr import PaddleOCRVL
+                if paddle is None or PaddleOCRVL is None:
+                    raise ImportError("PaddlePaddle / PaddleOCR 未安装或导入失败，请检查 paddlepaddle-gpu 和 paddleocr 安装")
 
                 # 设置 PaddlePaddle 使用指定的 GPU
                 # 必须在创建 PaddleOCRVL 实例之前设置
@@ -185,31 +267,290 @@ class PaddleOCRVLVLLMEngine:
                 logger.error(f"   错误信息: {e}")
                 logger.error("=" * 80)
 
-                import traceback
-                logger.debug("完整堆栈跟踪:")
-                logger.debug(traceback.format_exc())
+                logger.opt(exception=True).debug("完整堆栈跟踪:")
                 raise
 
-    def cleanup(self):
+    def cleanup(self, force: bool = False):
         """
         清理推理产生的显存（不卸载模型）
+
+        Args:
+            force: 是否强制释放 CUDA 缓存。默认仅在显存占用较高时释放，
+                连续解析时避免反复释放后又立即重新分配（empty_cache 会同步 CUDA 流）
         """
         try:
-            import paddle
-            import gc
+            # 清理 PaddlePaddle 显存（管道未加载时无需导入 paddle）
+            paddle = _import_paddle()[0] if self._pipeline is not None else None
+            if paddle is not None and paddle.device.is_compiled_with_cuda():
+                if force or self._is_vram_pressure_high(paddle):
+                    paddle.device.cuda.empty_cache()
+                    logger.debug("🧹 PaddleOCR-VL-VLLM: CUDA cache cleared")
 
-            # 清理 PaddlePaddle 显存
-            if paddle.device.is_compiled_with_cuda():
-                paddle.device.cuda.empty_cache()
-                logger.debug("🧹 PaddleOCR-VL-VLLM: CUDA cache cleared")
-
-            # 清理 Python 对象
-            gc.collect()
+            # 清理 Python 对象（全堆扫描开销较大，默认关闭）
+            if _GC_AFTER_PARSE:
+                gc.collect()
 
             logger.debug("🧹 PaddleOCR-VL-VLLM: Memory cleanup completed")
         except Exception as e:
             logger.debug(f"Memory cleanup warning: {e}")
 
+    def release_memory(self):
+        """空闲时释放缓存的显存（由 Worker 在任务队列空闲时调用）"""
+        self.cleanup(force=True)
+
+    def _is_vram_pressure_high(self, paddle) -> bool:
+        """PaddlePaddle 预留的显存是否超过阈值（无法获取显存信息时返回 True，保持每次释放）"""
+        try:
+            total = paddle.device.cuda.get_device_properties(self.gpu_id).total_memory
+            reserved = paddle.device.cuda.memory_reserved(self.gpu_id)
+            return reserved >= total * _EMPTY_CACHE_RESERVED_RATIO
+        except Exception:
+            return True
+
+    @staticmethod
+    def _persist_page(idx: int, total: int, res, page_output_dir: str) -> Tuple[Any, Any]:
+        """
+        保存单页结果（在线程池中并发执行，page_output_dir 已由调用方创建）
+
+        Returns:
+            (markdown, json)，缺失或出错时对应项为 None
+        """
+        logger.info(f"📝 处理结果 {idx}/{total}")
+
+        markdown = None
+        page_json = None
+        try:
+            # 保存 JSON（结构化数据）
+            if hasattr(res, "save_to_json"):
+                res.save_to_json(save_path=page_output_dir)
+
+            # 保存 Markdown 文件及页面图片（输出规范化依赖 page_*/ 下的图片和 JSON）
+            if hasattr(res, "save_to_markdown"):
+                res.save_to_markdown(save_path=page_output_dir)
+
+            # 收集结果用于合并
+            if hasattr(res, "markdown"):
+                markdown = res.markdown
+                logger.info("   ✅ 提取成功")
+
+            if hasattr(res, "json"):
+                page_json = res.json
+
+        except Exception as e:
+            logger.warning(f"   处理出错: {e}")
+            logger.opt(exception=True).debug("完整堆栈跟踪:")
+
+        return markdown, page_json
+
+    @staticmethod
+    def _ensure_output_dir(output_path) -> Path:
+        """确保输出目录存在（通常已由 Worker 创建：先做一次 stat，仅在不存在时才逐级创建）"""
+        output_dir_str = os.fspath(output_path)
+        if not os.path.isdir(output_dir_str):
+            os.makedirs(output_dir_str, exist_ok=True)
+        return Path(output_dir_str)
+
+    @staticmethod
+    def _group_results_by_input(result, inputs: List[str]) -> Optional[List[list]]:
+        """
+        按输入文件拆分批量 predict 的页面结果（每页结果带有 input_path）
+
+        Returns:
+            与 inputs 顺序一致的页面结果列表；无法可靠拆分时返回 None
+        """
+        if len(set(inputs)) != len(inputs):
+            return None
+
+        index = {}
+        for i, path in enumerate(inputs):
+            index[path] = i
+            index.setdefault(os.path.abspath(path), i)
+
+        grouped = [[] for _ in inputs]
+        for res in result:
+            try:
+                input_path = res["input_path"]
+            except (KeyError, TypeError):
+                input_path = getattr(res, "input_path", None)
+            i = index.get(input_path)
+            if i is None and input_path:
+                i = index.get(os.path.abspath(input_path))
+            if i is None:
+                return None
+            grouped[i].append(res)
+        return grouped
+
+    @staticmethod
+    def _build_predict_params(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """构造 predict 参数（不含 input）"""
+        # 模块级默认值 + 调用方传入的受支持参数
+        predict_params = {
+            **_PREDICT_DEFAULTS,
+            **{key: kwargs[key] for key in kwargs.keys() & _ALLOWED_PREDICT_KEYS},
+        }
+        # 默认值为只读元组，按原行为以列表形式传给 PaddleOCR
+        if isinstance(predict_params["markdown_ignore_labels"], tuple):
+            predict_params["markdown_ignore_labels"] = list(predict_params["markdown_ignore_labels"])
+
+        # 打印关键参数以便调试
+        logger.info(f"⚙️  功能开关: 方向矫正={predict_params['use_doc_orientation_classify']}, "
+                    f"扭曲矫正={predict_params['use_doc_unwarping']}, "
+                    f"印章识别={predict_params['use_seal_recognition']}")
+
+        return predict_params
+
+    @staticmethod
+    def _restructure_pages(pipeline, result, kwargs: Dict[str, Any]):
+        """页面重构（跨页表格合并、标题分级），失败时降级返回原始结果"""
+        should_restructure = kwargs.get("restructure_pages", True) # 默认开启
+
+        if should_restructure and hasattr(pipeline, "restructure_pages"):
+            logger.info("🔄 正在执行页面重构 (表格合并 & 标题分级)...")
+            try:
+                result = pipeline.restructure_pages(
+                    result,
+                    merge_table=kwargs.get("merge_tables", True),     # 跨页表格合并
+                    relevel_titles=kwargs.get("relevel_titles", True) # 标题级别识别
+                )
+                logger.info("✅ 页面重构完成")
+            except Exception as re_err:
+                logger.warning(f"⚠️ 页面重构失败 (降级使用原始结果): {re_err}")
+                logger.opt(exception=True).debug("完整堆栈跟踪:")
+
+        return result
+
+    def _save_results(self, pipeline, result, output_path: Path, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """保存逐页结果及合并后的 result.md / result.json，返回解析结果摘要"""
+        output_dir_str = os.fspath(output_path)
+
+        total_pages = len(result)
+        logger.info(f"   识别了 {total_pages} 页/张")
+
+        # 各页互不依赖，并发写盘，结果按页序收集
+        markdown_list = []
+        json_list = []
+
+        # 预先计算并创建每页子目录（output_path 已存在，无需逐级检查父目录）
+        page_dirs = [os.path.join(output_dir_str, f"page_{idx}") for idx in range(1, total_pages + 1)]
+        for page_dir in page_dirs:
+            os.makedirs(page_dir, exist_ok=True)
+
+        if _SAVE_IN_PROCESS:
+            page_results = self._persist_pages_in_process(result, page_dirs)
+        else:
+            max_workers = max(1, min(_PAGE_SAVE_WORKERS, total_pages))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="page-saver") as pool:
+                page_results = list(
+                    pool.map(
+                        lambda idx, res, page_dir: self._persist_page(idx, total_pages, res, page_dir),
+                        range(1, total_pages + 1),
+                        result,
+                        page_dirs,
+                    )
+                )
+
+        for markdown, page_json in page_results:
+            if markdown is not None:
+                markdown_list.append(markdown)
+            if page_json is not None:
+                json_list.append(page_json)
+
+        # 使用官方方法合并所有页的 Markdown
+        if hasattr(pipeline, "concatenate_markdown_pages"):
+            markdown_text = pipeline.concatenate_markdown_pages(markdown_list)
+            logger.info("   使用官方 concatenate_markdown_pages() 方法合并")
+        else:
+            # 降级方案：手动合并
+            logger.warning("   未找到 concatenate_markdown_pages() 方法，使用降级方案")
+            # 逐页写入 StringIO，不额外构造整份文本的中间字符串列表
+            buffer = io.StringIO()
+            for i, md in enumerate(markdown_list):
+                if i:
+                    buffer.write("\n\n---\n\n")
+                buffer.write(md if isinstance(md, str) else str(md.get("text", "")))
+            markdown_text = buffer.getvalue()
+
+        # 保存合并后的 Markdown 文件
+        markdown_file = output_path / "result.md"
+        _write_file_bytes(markdown_file, markdown_text.encode("utf-8"))
+        logger.info(f"📄 Markdown 已保存: {markdown_file}")
+        logger.info(f"   {total_pages} 页 | {len(markdown_text):,} 字符")
+
+        # 始终保存 JSON 文件
+        json_file = None
+        if json_list:
+            json_file = output_path / "result.json"
+            # 合并所有页的 JSON
+            combined_json = {"pages": json_list, "total_pages": total_pages}
+            # orjson 直接输出 UTF-8 字节（紧凑格式：该文件由 API 原样嵌入响应，无需缩进）
+            _write_file_bytes(
+                json_file, orjson.dumps(combined_json, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+            )
+            logger.info(f"📄 JSON 已保存: {json_file}")
+        else:
+            logger.warning("⚠️  无法提取 JSON 数据")
+
+        response = {
+            "success": True,
+            "output_path": str(output_path),
+            "markdown_file": str(markdown_file),
+            "json_file": str(json_file) if json_file else None,
+            "page_count": total_pages,
+            "markdown_chars": len(markdown_text),
+        }
+        if kwargs.get("return_inline", False):
+            # 仅在调用方需要时返回内存中的完整 Markdown 和 PaddleOCR 结果对象
+            response["markdown"] = markdown_text
+            response["result"] = result
+
+        del page_results, markdown_list, json_list, markdown_text
+        return response
+
+    def _get_save_pool(self) -> ProcessPoolExecutor:
+        """延迟创建子进程保存池（spawn：不继承父进程的 CUDA 上下文）"""
+        if self._save_pool is None:
+            with self._lock:
+                if self._save_pool is None:
+                    self._save_pool = ProcessPoolExecutor(
+                        max_workers=max(1, _SAVE_PROCESS_WORKERS),
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                    logger.info(f"🧵 Page save process pool started ({_SAVE_PROCESS_WORKERS} processes)")
+        return self._save_pool
+
+    def _persist_pages_in_process(self, result, page_dirs: List[str]) -> List[Tuple[Any, Any]]:
+        """
+        在子进程池中保存各页结果
+
+        单页无法提交或在子进程中失败（如结果对象无法 pickle）时，回退到当前进程保存该页
+        """
+        total_pages = len(page_dirs)
+        pool = self._get_save_pool()
+        futures = []
+        for idx, (res, page_dir) in enumerate(zip(result, page_dirs), 1):
+            try:
+                futures.append(pool.submit(self._persist_page, idx, total_pages, res, page_dir))
+            except Exception as e:
+                logger.debug(f"Page save submit failed: {e}")
+                futures.append(None)
+
+        page_results = []
+        for idx, (res, page_dir, future) in enumerate(zip(result, page_dirs, futures), 1):
+            try:
+                if future is None:
+                    raise RuntimeError("page save not submitted")
+                page_results.append(future.result())
+            except Exception as e:
+                logger.warning(f"⚠️  子进程保存第 {idx} 页失败，回退到当前进程: {e}")
+                page_results.append(self._persist_page(idx, total_pages, res, page_dir))
+        return page_results
+
+    def shutdown(self):
+        """关闭子进程保存池（由 Worker 退出时调用）"""
+        if self._save_pool is not None:
+            self._save_pool.shutdown(wait=True)
+            self._save_pool = None
+
     def parse(self, file_path: str, output_path: str, **kwargs) -> Dict[str, Any]:
         """
         全功能解析入口：解析文档或图片
@@ -231,179 +572,120 @@ class PaddleOCRVLVLLMEngine:
                 - repetition_penalty, temperature, top_p (float): VLLM 生成参数
 
         Returns:
-            解析结果（同时保存 Markdown 和 JSON 两种格式）
+            解析结果摘要（Markdown 和 JSON 已保存到 output_path，返回文件路径和页数等信息；
+            传入 return_inline=True 时额外返回 markdown 文本和原始 result 对象）
         """
-        file_path = Path(file_path)
-        output_path = Path(output_path)
-        output_path.mkdir(parents=True, exist_ok=True)
+        file_path = os.fspath(file_path)
+        output_path = self._ensure_output_dir(output_path)
 
-        logger.info(f"🤖 PaddleOCR-VL-VLLM parsing: {file_path.name}")
+        logger.info(f"🤖 PaddleOCR-VL-VLLM parsing: {os.path.basename(file_path)}")
         
         # 加载管道
         pipeline = self._load_pipeline()
 
-        # 1. 构造 predict 参数字典
-        # 使用 kwargs.get() 设置默认值，确保与官网 API 默认行为一致
-        predict_params = {
-            "input": str(file_path),
-            
-            # --- 图像矫正 & 预处理 ---
-            "use_doc_orientation_classify": kwargs.get("use_doc_orientation_classify", False),
-            "use_doc_unwarping": kwargs.get("use_doc_unwarping", False),
-            "min_pixels": kwargs.get("min_pixels", 147384),
-            "max_pixels": kwargs.get("max_pixels", 2822400),
-            
-            # --- 版面分析 & 识别功能 ---
-            "use_layout_detection": kwargs.get("use_layout_detection", True),
-            "use_chart_recognition": kwargs.get("use_chart_recognition", False),
-            "use_seal_recognition": kwargs.get("use_seal_recognition", False),
-            "use_ocr_for_image_block": kwargs.get("use_ocr_for_image_block", False),
-            
-            # --- 高级设置 ---
-            "layout_shape_mode": kwargs.get("layout_shape_mode", "auto"), # auto, rect, quad, poly
-            "layout_nms": kwargs.get("layout_nms", True),
-            "prompt_label": kwargs.get("prompt_label", None), # 仅当 use_layout_detection=False 时生效
-            
-            # --- VLLM 生成参数 ---
-            "repetition_penalty": kwargs.get("repetition_penalty", 1.0),
-            "temperature": kwargs.get("temperature", 0.0),
-            "top_p": kwargs.get("top_p", 1.0),
-            
-            # --- 辅助内容过滤 (Markdown忽略标签) ---
-            # 默认忽略：页码(number), 脚注(footnote), 页眉(header), 页脚(footer)等
-            "markdown_ignore_labels": kwargs.get("markdown_ignore_labels", [
-                'number', 'footnote', 'header', 'header_image', 
-                'footer', 'footer_image', 'aside_text'
-            ]),
-        }
-        
-        # 打印关键参数以便调试
-        logger.info(f"⚙️  功能开关: 方向矫正={predict_params['use_doc_orientation_classify']}, "
-                    f"扭曲矫正={predict_params['use_doc_unwarping']}, "
-                    f"印章识别={predict_params['use_seal_recognition']}")
+        predict_params = self._build_predict_params(kwargs)
+        predict_params["input"] = file_path
 
         # 执行推理
         try:
-            # 2. 调用 Pipeline 进行预测
+            # 1. 调用 Pipeline 进行预测
             result = pipeline.predict(**predict_params)
             logger.info("✅ 推理完成")
 
-            # 3. 后处理：页面重构 (跨页合并、标题分级)
-            # 这些功能是通过 restructure_pages 实现的
-            should_restructure = kwargs.get("restructure_pages", True) # 默认开启
-            
-            if should_restructure and hasattr(pipeline, "restructure_pages"):
-                logger.info("🔄 正在执行页面重构 (表格合并 & 标题分级)...")
-                try:
-                    result = pipeline.restructure_pages(
-                        result,
-                        merge_table=kwargs.get("merge_tables", True),     # 跨页表格合并
-                        relevel_titles=kwargs.get("relevel_titles", True) # 标题级别识别
-                    )
-                    logger.info("✅ 页面重构完成")
-                except Exception as re_err:
-                    logger.warning(f"⚠️ 页面重构失败 (降级使用原始结果): {re_err}")
-                    import traceback
-                    logger.debug(traceback.format_exc())
+            # 2. 后处理：页面重构 (跨页合并、标题分级)
+            result = self._restructure_pages(pipeline, result, kwargs)
 
-            logger.info(f"   识别了 {len(result)} 页/张")
+            # 3. 保存结果
+            response = self._save_results(pipeline, result, output_path, kwargs)
 
-            # 4. 保存结果
-            markdown_list = []
-            json_list = []
+            # 尽早释放页面结果（持有图像 / numpy 数组），便于随后的 cleanup() 回收
+            del result
+            return response
 
-            for idx, res in enumerate(result, 1):
-                logger.info(f"📝 处理结果 {idx}/{len(result)}")
+        except Exception as e:
+            logger.error("=" * 80)
+            logger.error("❌ OCR 解析失败:")
+            logger.error(f"   错误类型: {type(e).__name__}")
+            logger.error(f"   错误信息: {e}")
+            logger.error("=" * 80)
 
-                try:
-                    # 为每页创建子目录并保存完整结果（便于调试）
-                    page_output_dir = output_path / f"page_{idx}"
-                    page_output_dir.mkdir(parents=True, exist_ok=True)
-
-                    # 保存 JSON（结构化数据）
-                    if hasattr(res, "save_to_json"):
-                        res.save_to_json(save_path=str(page_output_dir))
-
-                    # 保存 Markdown 文件（便于调试）
-                    if hasattr(res, "save_to_markdown"):
-                        res.save_to_markdown(save_path=str(page_output_dir))
-
-                    # 收集结果用于合并
-                    if hasattr(res, "markdown"):
-                        markdown_list.append(res.markdown)
-                        logger.info("   ✅ 提取成功")
-                    
-                    if hasattr(res, "json"):
-                        json_list.append(res.json)
+            logger.opt(exception=True).debug("完整堆栈跟踪:")
+
+            raise
+
+        finally:
+            # 清理显存（无论成功或失败都执行）
+            self.cleanup()
+
+    def parse_many(self, jobs: List[Tuple[str, str]], **kwargs) -> List[Dict[str, Any]]:
+        """
+        批量解析入口：所有文件在一次 predict 调用中提交，共享管道与显存清理
+
+        Args:
+            jobs: [(输入文件路径, 输出目录), ...]
+            **kwargs: 同 parse()，对所有文件生效
+
+        Returns:
+            与 jobs 顺序一致的解析结果摘要列表；单个文件保存失败时对应项为
+            {"success": False, "output_path": ..., "error": ...}
+        """
+        jobs = [(os.fspath(file_path), os.fspath(output_path)) for file_path, output_path in jobs]
+        if not jobs:
+            return []
+
+        output_paths = [self._ensure_output_dir(output_path) for _, output_path in jobs]
+        inputs = [file_path for file_path, _ in jobs]
+
+        logger.info(f"🤖 PaddleOCR-VL-VLLM batch parsing: {len(jobs)} files")
 
+        # 加载管道
+        pipeline = self._load_pipeline()
+
+        predict_params = self._build_predict_params(kwargs)
+        predict_params["input"] = inputs
+
+        try:
+            # 1. 一次性提交所有文件进行预测
+            result = pipeline.predict(**predict_params)
+            logger.info("✅ 推理完成")
+
+            grouped = self._group_results_by_input(result, inputs)
+            del result
+            if grouped is None:
+                logger.warning("⚠️  无法按输入文件拆分批量结果，改为逐个文件推理")
+                grouped = [pipeline.predict(**{**predict_params, "input": file_path}) for file_path in inputs]
+
+            # 2. 逐个文件执行页面重构并保存结果
+            responses = []
+            for file_path, output_path, job_result in zip(inputs, output_paths, grouped):
+                try:
+                    job_result = self._restructure_pages(pipeline, job_result, kwargs)
+                    responses.append(self._save_results(pipeline, job_result, output_path, kwargs))
                 except Exception as e:
-                    logger.warning(f"   处理出错: {e}")
-                    import traceback
-                    logger.debug(traceback.format_exc())
-
-            # 使用官方方法合并所有页的 Markdown
-            if hasattr(pipeline, "concatenate_markdown_pages"):
-                markdown_text = pipeline.concatenate_markdown_pages(markdown_list)
-                logger.info("   使用官方 concatenate_markdown_pages() 方法合并")
-            else:
-                # 降级方案：手动合并
-                logger.warning("   未找到 concatenate_markdown_pages() 方法，使用降级方案")
-                markdown_text = "\n\n---\n\n".join(
-                    [str(md) if isinstance(md, str) else str(md.get("text", "")) for md in markdown_list]
-                )
+                    logger.error(f"❌ 结果保存失败: {os.path.basename(file_path)}: {e}")
+                    logger.opt(exception=True).debug("完整堆栈跟踪:")
+                    responses.append({"success": False, "output_path": str(output_path), "error": str(e)})
 
-            # 保存合并后的 Markdown 文件
-            markdown_file = output_path / "result.md"
-            markdown_file.write_text(markdown_text, encoding="utf-8")
-            logger.info(f"📄 Markdown 已保存: {markdown_file}")
-            logger.info(f"   {len(result)} 页 | {len(markdown_text):,} 字符")
-
-            # 始终保存 JSON 文件
-            json_file = None
-            if json_list:
-                json_file = output_path / "result.json"
-                # 合并所有页的 JSON
-                combined_json = {"pages": json_list, "total_pages": len(result)}
-                with open(json_file, "w", encoding="utf-8") as f:
-                    json.dump(combined_json, f, ensure_ascii=False, indent=2)
-                logger.info(f"📄 JSON 已保存: {json_file}")
-            else:
-                logger.warning("⚠️  无法提取 JSON 数据")
-
-            return {
-                "success": True,
-                "output_path": str(output_path),
-                "markdown": markdown_text,
-                "markdown_file": str(markdown_file),
-                "json_file": str(json_file) if json_file else None,
-                "result": result,
-            }
+            del grouped, job_result
+            return responses
 
         except Exception as e:
             logger.error("=" * 80)
-            logger.error("❌ OCR 解析失败:")
+            logger.error("❌ OCR 批量解析失败:")
             logger.error(f"   错误类型: {type(e).__name__}")
             logger.error(f"   错误信息: {e}")
             logger.error("=" * 80)
 
-            import traceback
-            logger.debug("完整堆栈跟踪:")
-            logger.debug(traceback.format_exc())
+            logger.opt(exception=True).debug("完整堆栈跟踪:")
 
             raise
 
         finally:
-            # 清理显存（无论成功或失败都执行）
+            # 整批只清理一次显存
             self.cleanup()
 
 
-# 全局单例
-_engine = None
-
-
-def get_engine() -> PaddleOCRVLVLLMEngine:
-    """获取全局引擎实例"""
-    global _engine
-    if _engine is None:
-        _engine = PaddleOCRVLVLLMEngine()
-    return _engine
+@lru_cache(maxsize=None)
+def get_engine(device: str = "cuda:0", vllm_api_base: str = "http://localhost:17300/v1") -> PaddleOCRVLVLLMEngine:
+    """获取进程内共享的引擎实例（每个 device + vllm_api_base 组合只创建一次）"""
+    return PaddleOCRVLVLLMEngine(device=device, vllm_api_base=vllm_api_base)
@@ -15,6 +15,7 @@ MinerU Tianshu - 启动所有服务 (All-in-One)
 import subprocess
 import signal
 import sys
+import threading
 import time
 import os
 import requests
@@ -24,6 +25,44 @@ import argparse
 from utils import parse_list_arg
 from dotenv import load_dotenv
 
+# 各服务脚本所在目录（子进程工作目录）
+BACKEND_DIR = Path(__file__).parent
+
+# OCR 模型检查脚本（在子进程中执行）
+_OCR_MODEL_CHECK_SCRIPT = """
+from loguru import logger
+
+try:
+    from paddleocr_vl import PaddleOCRVLEngine
+
+    logger.info("🔍 Checking PaddleOCR-VL...")
+    logger.info("   Note: PaddleOCR-VL models are auto-managed by PaddleOCR")
+
+    # 简单初始化引擎（不触发下载）
+    try:
+        PaddleOCRVLEngine()
+        logger.info("✅ PaddleOCR-VL engine initialized successfully")
+    except Exception as e:
+        # 如果是因为缺少 API 连接导致的错误是正常的，只要包在就行
+        logger.debug(f"PaddleOCR-VL init check: {e}")
+
+except ImportError:
+    logger.debug("PaddleOCR-VL not installed, skipping check")
+except Exception as e:
+    logger.debug(f"PaddleOCR-VL check skipped: {e}")
+"""
+
+
+def _wait_exit_without_reaping(proc):
+    """阻塞直到子进程退出，但不回收（留给 Popen.poll() 和 wait() 中的看门狗处理）"""
+    if hasattr(os, "waitid"):
+        try:
+            os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+        except ChildProcessError:
+            pass
+    else:
+        proc.wait()
+
 
 class TianshuLauncher:
     """天枢服务启动器"""
@@ -57,6 +96,8 @@ class TianshuLauncher:
         self.enable_mcp = enable_mcp
         self.mcp_port = mcp_port
         self.processes = []
+        self.helper_processes = []  # 辅助子进程（如 OCR 模型检查）：不参与存活监控，但随启动器一起关闭
+        self._base_env = None  # 子进程基础环境变量（首次启动子进程时构造）
         
         # VLLM 相关配置
         self.paddleocr_vl_vllm_engine_enabled = paddleocr_vl_vllm_engine_enabled
@@ -69,60 +110,142 @@ class TianshuLauncher:
 
     def check_ocr_models(self):
         """检查并下载所有 OCR 模型（异步，不阻塞启动）"""
-        import threading
-
-        # 1. 检查 PaddleOCR-VL 模型
-        def check_paddleocr_vl():
-            try:
-                from paddleocr_vl import PaddleOCRVLEngine
-
-                logger.info("🔍 Checking PaddleOCR-VL...")
-                logger.info("   Note: PaddleOCR-VL models are auto-managed by PaddleOCR")
-                
-                # 简单初始化引擎（不触发下载）
-                try:
-                    PaddleOCRVLEngine()
-                    logger.info("✅ PaddleOCR-VL engine initialized successfully")
-                except Exception as e:
-                    # 如果是因为缺少 API 连接导致的错误是正常的，只要包在就行
-                    logger.debug(f"PaddleOCR-VL init check: {e}")
-
-            except ImportError:
-                logger.debug("PaddleOCR-VL not installed, skipping check")
-            except Exception as e:
-                logger.debug(f"PaddleOCR-VL check skipped: {e}")
-
-        # 在后台线程中下载/检查模型
-        thread_paddleocr = threading.Thread(target=check_paddleocr_vl, daemon=True)
-        thread_paddleocr.start()
+        # 在独立子进程中检查（导入 PaddlePaddle 体积很大，不留在启动器进程中；子进程退出后内存即回收）
+        self._start_process(
+            "OCR Model Check", [sys.executable, "-c", _OCR_MODEL_CHECK_SCRIPT], cwd=BACKEND_DIR, track=False
+        )
+
+    def _child_env(self, **overrides):
+        """
+        构造子进程环境变量：基础环境只从 os.environ 复制一次，各服务在其上叠加自己的变量
+        """
+        if self._base_env is None:
+            self._base_env = os.environ.copy()
+            # 输出改为管道后 Python 子进程的 stdout 会变为块缓冲，关闭缓冲以保持日志实时
+            self._base_env.setdefault("PYTHONUNBUFFERED", "1")
+        return {**self._base_env, **overrides} if overrides else self._base_env
+
+    def _start_process(self, name, cmd, track=True, **popen_kwargs):
+        """
+        启动子进程，track=True 时登记到 self.processes（随启动器监控与关闭），
+        否则登记到 self.helper_processes（退出不视为服务异常，但关闭启动器时一并终止）
+
+        子进程的 stdout/stderr 合并后经管道读取，由后台线程逐行转发到启动器日志（带服务名前缀），
+        子进程不再直接同步写入终端
+        """
+        if "env" not in popen_kwargs:
+            popen_kwargs["env"] = self._child_env()
+
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            errors="replace",
+            **popen_kwargs,
+        )
+        if track:
+            self.processes.append((name, proc))
+        else:
+            self.helper_processes.append((name, proc))
+        threading.Thread(target=self._forward_output, args=(name, proc), daemon=True).start()
+        return proc
+
+    @staticmethod
+    def _forward_output(name, proc):
+        """逐行转发子进程输出（子进程退出、管道关闭后结束）"""
+        prefix = f"[{name}] "
+        with proc.stdout:
+            for line in proc.stdout:
+                logger.opt(raw=True).info(prefix + line.rstrip("\n") + "\n")
 
     def wait_for_vllm(self, port, timeout=300):
         """等待 VLLM 服务启动就绪"""
         start_time = time.time()
         health_url = f"http://localhost:{port}/v1/models"
-        
+        vllm_proc = next((proc for name, proc in self.processes if name == "VLLM Service"), None)
+
         logger.info(f"⏳ Waiting for VLLM to load model at {health_url}...")
-        
-        while time.time() - start_time < timeout:
-            try:
-                response = requests.get(health_url)
-                if response.status_code == 200:
-                    logger.info("✅ VLLM Service is ready!")
-                    return True
-            except requests.RequestException:
-                pass
-            
-            # 检查进程是否还在
-            for name, proc in self.processes:
-                if name == "VLLM Service" and proc.poll() is not None:
+
+        # 后台线程阻塞等待进程退出：进程一旦退出，下面的等待立即被唤醒，无需轮询
+        exited = threading.Event()
+        if vllm_proc is not None:
+            threading.Thread(target=lambda: (_wait_exit_without_reaping(vllm_proc), exited.set()), daemon=True).start()
+
+        # 复用同一个 keep-alive 连接探测；探测间隔从 0.25s 逐步退避到 2s
+        delay = 0.25
+        with requests.Session() as session:
+            while time.time() - start_time < timeout:
+                if exited.is_set():
                     logger.error("❌ VLLM process died while starting!")
                     return False
-            
-            time.sleep(2)
-            
+
+                try:
+                    # 连接超时 0.5s / 读取超时 1s，避免单次探测长时间阻塞
+                    response = session.get(health_url, timeout=(0.5, 1.0))
+                    if response.status_code == 200:
+                        logger.info("✅ VLLM Service is ready!")
+                        return True
+                except requests.RequestException:
+                    pass
+
+                if exited.wait(delay):
+                    logger.error("❌ VLLM process died while starting!")
+                    return False
+
+                delay = min(delay * 2, 2.0)
+
         logger.error("❌ Timeout waiting for VLLM to start.")
         return False
 
+    def _wait_for_services(self, services, timeout=None, grace=None):
+        """
+        并发等待多个服务就绪
+
+        Args:
+            services: [(名称, 进程, 健康检查 URL 或 None), ...]
+            timeout: 等待健康检查通过的最长时间（秒，默认读取 SERVICE_STARTUP_TIMEOUT，60）
+            grace: 无健康检查的服务需存活的时间（秒，默认读取 SERVICE_STARTUP_GRACE，2）
+
+        Returns:
+            bool: 全部就绪返回 True；任一进程退出或超时返回 False
+        """
+        if timeout is None:
+            timeout = float(os.getenv("SERVICE_STARTUP_TIMEOUT", "60"))
+        if grace is None:
+            grace = float(os.getenv("SERVICE_STARTUP_GRACE", "2"))
+
+        start_time = time.time()
+        pending = list(services)
+
+        with requests.Session() as session:
+            while pending:
+                elapsed = time.time() - start_time
+                still_pending = []
+                for name, proc, health_url in pending:
+                    if proc.poll() is not None:
+                        logger.error(f"❌ {name} failed to start!")
+                        return False
+                    if health_url is None:
+                        ready = elapsed >= grace
+                    else:
+                        try:
+                            ready = session.get(health_url, timeout=1.0).status_code == 200
+                        except requests.RequestException:
+                            ready = False
+                    if not ready:
+                        still_pending.append((name, proc, health_url))
+                pending = still_pending
+
+                if pending:
+                    if elapsed >= timeout:
+                        logger.error(f"❌ Timeout waiting for: {', '.join(name for name, _, _ in pending)}")
+                        return False
+                    time.sleep(0.25)
+
+        return True
+
     def start_services(self):
         """启动所有服务"""
         logger.info("=" * 70)
@@ -142,10 +265,6 @@ class TianshuLauncher:
             # ---------------------------------------------------------
             if self.start_local_vllm:
                 logger.info(f"🧠 [{current_step}/{total_services}] Starting Local VLLM Service...")
-                
-                if not self.vllm_model_path:
-                    logger.error("❌ --vllm-model-path is required when --start-local-vllm is enabled")
-                    return False
 
                 # 构建 VLLM 启动命令
                 # 使用 python -m vllm.entrypoints.openai.api_server 以确保使用当前环境
@@ -160,14 +279,13 @@ class TianshuLauncher:
                 ]
                 
                 # 如果指定了 device，可能需要设置 CUDA_VISIBLE_DEVICES
-                vllm_env = os.environ.copy()
+                vllm_env = self._child_env()
                 if self.devices != "auto" and isinstance(self.devices, list):
                      # 假设 VLLM 占用第一个设备，其余给 Worker，或者用户需自行通过环境变量控制
                      # 这里简单处理：让 VLLM 看所有卡，通过 tensor-parallel-size 控制（未在此处暴露）
                      pass
 
-                vllm_proc = subprocess.Popen(vllm_cmd, env=vllm_env)
-                self.processes.append(("VLLM Service", vllm_proc))
+                self._start_process("VLLM Service", vllm_cmd, env=vllm_env)
                 
                 # 等待 VLLM 就绪
                 if not self.wait_for_vllm(self.vllm_port):
@@ -182,33 +300,24 @@ class TianshuLauncher:
                 current_step += 1
                 logger.info("")
 
+            # API Server / Worker Pool / Scheduler / MCP 启动时互不依赖
+            # （Scheduler 通过 --wait-for-workers 自行等待 Worker），依次拉起后统一等待就绪
+            services = []
+
             # ---------------------------------------------------------
             # 1. 启动 API Server
             # ---------------------------------------------------------
             logger.info(f"📡 [{current_step}/{total_services}] Starting API Server...")
-            env = os.environ.copy()
-            env["API_PORT"] = str(self.api_port)
-            env["OUTPUT_PATH"] = self.output_dir
-            api_proc = subprocess.Popen([sys.executable, "api_server.py"], cwd=Path(__file__).parent, env=env)
-            self.processes.append(("API Server", api_proc))
-            time.sleep(3)
-
-            if api_proc.poll() is not None:
-                logger.error("❌ API Server failed to start!")
-                return False
-
-            logger.info(f"   ✅ API Server started (PID: {api_proc.pid})")
-            logger.info(f"   📖 API Docs: http://localhost:{self.api_port}/docs")
+            env = self._child_env(API_PORT=str(self.api_port), OUTPUT_PATH=self.output_dir)
+            api_proc = self._start_process("API Server", [sys.executable, "api_server.py"], cwd=BACKEND_DIR, env=env)
+            services.append(("API Server", api_proc, f"http://localhost:{self.api_port}/api/v1/health"))
             current_step += 1
-            logger.info("")
 
             # ---------------------------------------------------------
             # 2. 启动 LitServe Worker Pool
             # ---------------------------------------------------------
             logger.info(f"⚙️  [{current_step}/{total_services}] Starting LitServe Worker Pool...")
-            worker_env = os.environ.copy()
-            worker_env["WORKER_PORT"] = str(self.worker_port)
-            worker_env["OUTPUT_PATH"] = self.output_dir
+            worker_env = self._child_env(WORKER_PORT=str(self.worker_port), OUTPUT_PATH=self.output_dir)
 
             worker_cmd = [
                 sys.executable,
@@ -227,17 +336,10 @@ class TianshuLauncher:
             # 此时 self.paddleocr_vl_vllm_api_list 可能已经包含本地启动的 VLLM
             worker_cmd.extend(["--paddleocr-vl-vllm-api-list", str(self.paddleocr_vl_vllm_api_list)])
 
-            worker_proc = subprocess.Popen(worker_cmd, cwd=Path(__file__).parent, env=worker_env)
-            self.processes.append(("LitServe Workers", worker_proc))
-            time.sleep(5)
-
-            if worker_proc.poll() is not None:
-                logger.error("❌ LitServe Workers failed to start!")
-                return False
-
-            logger.info(f"   ✅ LitServe Workers started (PID: {worker_proc.pid})")
+            worker_proc = self._start_process("LitServe Workers", worker_cmd, cwd=BACKEND_DIR, env=worker_env)
+            # Worker 加载模型耗时不定，只确认进程存活，不等待其健康检查
+            services.append(("LitServe Workers", worker_proc, None))
             current_step += 1
-            logger.info("")
 
             # ---------------------------------------------------------
             # 3. 启动 Task Scheduler
@@ -250,39 +352,38 @@ class TianshuLauncher:
                 "--wait-for-workers",
             ]
 
-            scheduler_proc = subprocess.Popen(scheduler_cmd, cwd=Path(__file__).parent)
-            self.processes.append(("Task Scheduler", scheduler_proc))
-            time.sleep(3)
-
-            if scheduler_proc.poll() is not None:
-                logger.error("❌ Task Scheduler failed to start!")
-                return False
-
-            logger.info(f"   ✅ Task Scheduler started (PID: {scheduler_proc.pid})")
+            scheduler_proc = self._start_process("Task Scheduler", scheduler_cmd, cwd=BACKEND_DIR)
+            services.append(("Task Scheduler", scheduler_proc, None))
             current_step += 1
-            logger.info("")
 
             # ---------------------------------------------------------
             # 4. 启动 MCP Server（可选）
             # ---------------------------------------------------------
             if self.enable_mcp:
                 logger.info(f"🔌 [{current_step}/{total_services}] Starting MCP Server...")
-                mcp_env = os.environ.copy()
-                mcp_env["API_BASE_URL"] = f"http://localhost:{self.api_port}"
-                mcp_env["MCP_PORT"] = str(self.mcp_port)
-                mcp_env["MCP_HOST"] = "0.0.0.0"
+                mcp_env = self._child_env(
+                    API_BASE_URL=f"http://localhost:{self.api_port}",
+                    MCP_PORT=str(self.mcp_port),
+                    MCP_HOST="0.0.0.0",
+                )
 
-                mcp_proc = subprocess.Popen([sys.executable, "mcp_server.py"], cwd=Path(__file__).parent, env=mcp_env)
-                self.processes.append(("MCP Server", mcp_proc))
-                time.sleep(3)
+                mcp_proc = self._start_process(
+                    "MCP Server", [sys.executable, "mcp_server.py"], cwd=BACKEND_DIR, env=mcp_env
+                )
+                services.append(("MCP Server", mcp_proc, f"http://localhost:{self.mcp_port}/health"))
 
-                if mcp_proc.poll() is not None:
-                    logger.error("❌ MCP Server failed to start!")
-                    return False
+            logger.info("")
+            if not self._wait_for_services(services):
+                return False
 
+            logger.info(f"   ✅ API Server started (PID: {api_proc.pid})")
+            logger.info(f"   📖 API Docs: http://localhost:{self.api_port}/docs")
+            logger.info(f"   ✅ LitServe Workers started (PID: {worker_proc.pid})")
+            logger.info(f"   ✅ Task Scheduler started (PID: {scheduler_proc.pid})")
+            if self.enable_mcp:
                 logger.info(f"   ✅ MCP Server started (PID: {mcp_proc.pid})")
                 logger.info(f"   🌐 MCP Endpoint: http://localhost:{self.mcp_port}/mcp")
-                logger.info("")
+            logger.info("")
 
             # 启动成功
             logger.info("=" * 70)
@@ -313,14 +414,17 @@ class TianshuLauncher:
         logger.info("⏹️  Stopping All Services...")
         logger.info("=" * 70)
 
-        # 倒序关闭，先关后启动的，最后关最基础的服务
-        for name, proc in reversed(self.processes):
+        # 仍在运行的辅助进程先关（如 OCR 模型检查，可能占用大量内存/显存），
+        # 服务倒序关闭，先关后启动的，最后关最基础的服务
+        processes = [(name, proc) for name, proc in self.helper_processes if proc.poll() is None]
+        processes += reversed(self.processes)
+        for name, proc in processes:
             if proc.poll() is None:
                 logger.info(f"   Stopping {name} (PID: {proc.pid})...")
                 proc.terminate()
 
         # 等待进程结束
-        for name, proc in reversed(self.processes):
+        for name, proc in processes:
             try:
                 proc.wait(timeout=10)
                 logger.info(f"   ✅ {name} stopped")
@@ -337,6 +441,11 @@ class TianshuLauncher:
     def wait(self):
         """等待所有服务"""
         try:
+            if hasattr(os, "waitid"):
+                self._wait_for_child_exit()
+                return
+
+            # 不支持 waitid 的平台：每秒轮询
             while True:
                 time.sleep(1)
                 for name, proc in self.processes:
@@ -347,10 +456,44 @@ class TianshuLauncher:
         except KeyboardInterrupt:
             self.stop_services()
 
+    def _wait_for_child_exit(self):
+        """
+        阻塞等待任一子进程退出（waitid + WNOWAIT：内核通知，无需轮询，且不抢先回收子进程）
+        """
+        procs_by_pid = {proc.pid: (name, proc) for name, proc in self.processes}
+        helpers_by_pid = {proc.pid: proc for name, proc in self.helper_processes}
+        while True:
+            try:
+                info = os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOWAIT)
+            except ChildProcessError:
+                # 已没有任何子进程
+                logger.error("❌ All services unexpectedly stopped!")
+                self.stop_services()
+                return
+            if info is None:
+                continue
+
+            if info.si_pid in procs_by_pid:
+                name, proc = procs_by_pid[info.si_pid]
+                proc.poll()  # 由 Popen 回收，记录退出码
+                logger.error(f"❌ {name} unexpectedly stopped!")
+                self.stop_services()
+                return
+
+            # 辅助子进程（如 OCR 模型检查）正常结束：由 Popen 回收；其他未登记的子进程直接回收
+            helper = helpers_by_pid.pop(info.si_pid, None)
+            if helper is not None:
+                helper.poll()
+                continue
+            try:
+                os.waitpid(info.si_pid, 0)
+            except ChildProcessError:
+                pass
+
 
 def main():
     """主函数"""
-    env_path = Path(__file__).parent / ".env"
+    env_path = BACKEND_DIR / ".env"
     if env_path.exists():
         load_dotenv(dotenv_path=env_path)
     
@@ -399,6 +542,10 @@ def main():
         args.paddleocr_vl_vllm_engine_enabled = True
         logger.info("🚀 Local VLLM startup requested, auto-enabling PaddleOCR VLLM Engine.")
 
+    if args.start_local_vllm and not args.vllm_model_path:
+        logger.error("❌ --vllm-model-path is required when --start-local-vllm is enabled")
+        sys.exit(1)
+
     if args.paddleocr_vl_vllm_engine_enabled:
         if not args.paddleocr_vl_vllm_api_list and not args.start_local_vllm:
              logger.error("启用 VLLM 引擎时，必须提供 --paddleocr-vl-vllm-api-list 或开启 --start-local-vllm")
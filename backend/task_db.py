@@ -11,9 +11,14 @@ MinerU Tianshu - SQLite Task Database Manager
     - 当 Redis 不可用时，自动回退到 SQLite
 """
 
+import os
 import sqlite3
 import json
 import uuid
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from typing import Optional, List, Dict
 from pathlib import Path
@@ -31,6 +36,34 @@ except ImportError:
         return None
 
 
+# SQLite 连接参数
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # 负数单位为 KiB，即 64MB
+# 数据库专用线程池大小（async 接口使用）
+SQLITE_EXECUTOR_WORKERS = int(os.getenv("SQLITE_EXECUTOR_WORKERS", "8"))
+
+# 任务列表返回的字段（不含 options、file_path 等大字段/内部字段）
+DEFAULT_LIST_COLUMNS = (
+    "task_id",
+    "file_name",
+    "status",
+    "priority",
+    "backend",
+    "result_path",
+    "error_message",
+    "created_at",
+    "started_at",
+    "completed_at",
+    "worker_id",
+    "retry_count",
+    "user_id",
+    "parent_task_id",
+    "is_parent",
+    "child_count",
+    "child_completed",
+)
+
+
 class TaskDB:
     """任务数据库管理类"""
 
@@ -55,27 +88,69 @@ class TaskDB:
 
         # 确保 db_path 是绝对路径字符串
         self.db_path = str(Path(db_path).resolve())
+
+        # 线程本地连接（每个线程复用一个连接）和数据库专用线程池（惰性创建）
+        self._local = threading.local()
+        self._executor = None
+        self._executor_pid = None
+
         self._init_db()
 
+    def __getstate__(self):
+        # 线程本地连接和线程池不可 pickle，由子进程按需重建
+        state = self.__dict__.copy()
+        state.pop("_local", None)
+        state.pop("_executor", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._executor = None
+        self._executor_pid = None
+
+    def _create_conn(self):
+        """创建新的数据库连接并设置连接级 PRAGMA
+
+        - synchronous=NORMAL: WAL 模式下安全且显著减少 fsync
+        - mmap_size: 读取走内存映射，减少 read 系统调用
+        - cache_size: 负数表示 KiB，扩大页缓存
+        - timeout=30.0 防止死锁，如果锁等待超过30秒会抛出异常
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+        return conn
+
     def _get_conn(self):
-        """获取数据库连接（每次创建新连接，避免 pickle 问题）
+        """获取当前线程复用的数据库连接（线程本地连接池）
 
         并发安全说明：
-            - 使用 check_same_thread=False 是安全的，因为：
-              1. 每次调用都创建新连接，不跨线程共享
-              2. 连接使用完立即关闭（在 get_cursor 上下文管理器中）
-              3. 不使用连接池，避免线程间共享同一连接
-            - timeout=30.0 防止死锁，如果锁等待超过30秒会抛出异常
+            - 每个线程持有自己的连接，不跨线程共享
+            - 记录创建连接的进程 PID，fork 后的子进程不会复用父进程的连接
+            - WAL 模式下读写互不阻塞，多个线程/进程的读可以并发
         """
-        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30.0)
-        conn.row_factory = sqlite3.Row
+        cached = getattr(self._local, "conn", None)
+        if cached is not None and cached[0] == os.getpid():
+            return cached[1]
+        conn = self._create_conn()
+        self._local.conn = (os.getpid(), conn)
         return conn
 
     @contextmanager
     def get_cursor(self):
-        """上下文管理器，自动提交和错误处理"""
-        conn = self._get_conn()
+        """上下文管理器，自动提交和错误处理
+
+        使用当前线程的复用连接；若同一线程内嵌套调用，
+        内层使用独立的临时连接（与原先每次新建连接的事务语义一致）
+        """
+        nested = getattr(self._local, "in_use", False)
+        conn = self._create_conn() if nested else self._get_conn()
         cursor = conn.cursor()
+        if not nested:
+            self._local.in_use = True
         try:
             yield cursor
             conn.commit()
@@ -83,10 +158,55 @@ class TaskDB:
             conn.rollback()
             raise e
         finally:
-            conn.close()  # 关闭连接
+            cursor.close()
+            if nested:
+                conn.close()  # 关闭临时连接
+            else:
+                self._local.in_use = False
+
+    def _run_in_executor(self, func, *args, **kwargs):
+        """在数据库专用线程池中执行同步方法，供 async 接口调用"""
+        # fork 后线程池不可用，按进程重建
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=SQLITE_EXECUTOR_WORKERS, thread_name_prefix="taskdb")
+            self._executor_pid = os.getpid()
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def aget_task(self, task_id: str) -> Optional[Dict]:
+        """get_task 的异步版本（不阻塞事件循环）"""
+        return await self._run_in_executor(self.get_task, task_id)
+
+    async def aget_queue_stats(self) -> Dict[str, int]:
+        """get_queue_stats 的异步版本"""
+        return await self._run_in_executor(self.get_queue_stats)
+
+    async def alist_tasks(self, *args, **kwargs) -> List[Dict]:
+        """list_tasks 的异步版本"""
+        return await self._run_in_executor(self.list_tasks, *args, **kwargs)
+
+    async def acreate_task(self, *args, **kwargs) -> str:
+        """create_task 的异步版本"""
+        return await self._run_in_executor(self.create_task, *args, **kwargs)
+
+    async def aupdate_task_status(self, *args, **kwargs) -> bool:
+        """update_task_status 的异步版本"""
+        return await self._run_in_executor(self.update_task_status, *args, **kwargs)
+
+    async def acleanup_old_task_records(self, days: int = 30) -> int:
+        """cleanup_old_task_records 的异步版本"""
+        return await self._run_in_executor(self.cleanup_old_task_records, days)
+
+    async def areset_stale_tasks(self, timeout_minutes: int = 60) -> int:
+        """reset_stale_tasks 的异步版本"""
+        return await self._run_in_executor(self.reset_stale_tasks, timeout_minutes)
 
     def _init_db(self):
         """初始化数据库表"""
+        # WAL 模式：读写并发、写入更快（持久化在数据库文件中，只需设置一次）
+        with self.get_cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode=WAL")
+
         with self.get_cursor() as cursor:
             # 创建表（如果不存在）
             cursor.execute("""
@@ -138,6 +258,22 @@ class TaskDB:
                 cursor.execute("ALTER TABLE tasks ADD COLUMN user_id TEXT")
                 logger.info("✅ user_id field added")
 
+            # 任务列表查询索引（按用户/状态筛选并按创建时间倒序）
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_user_status_created ON tasks(user_id, status, created_at DESC)"
+            )
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_created ON tasks(user_id, created_at DESC)")
+
+            # 迁移：添加结果产物路径字段（如果不存在）
+            try:
+                cursor.execute("SELECT markdown_path FROM tasks LIMIT 1")
+            except sqlite3.OperationalError:
+                logger.info("📊 Migrating database schema: adding result artifact fields")
+                cursor.execute("ALTER TABLE tasks ADD COLUMN markdown_path TEXT")
+                cursor.execute("ALTER TABLE tasks ADD COLUMN json_path TEXT")
+                cursor.execute("ALTER TABLE tasks ADD COLUMN image_dir TEXT")
+                logger.info("✅ Result artifact fields added")
+
     def create_task(
         self,
         file_name: str,
@@ -491,6 +627,36 @@ class TaskDB:
 
             return success
 
+    def set_task_artifacts(
+        self, task_id: str, markdown_path: str = None, json_path: str = None, image_dir: str = None
+    ) -> bool:
+        """
+        记录任务结果产物路径（Worker 在任务完成时调用）
+
+        API 查询任务状态时直接使用这些路径，无需递归扫描结果目录
+
+        Args:
+            task_id: 任务ID
+            markdown_path: 主 Markdown 文件路径
+            json_path: 主 JSON 文件路径（可选）
+            image_dir: 图片目录路径（可选）
+
+        Returns:
+            bool: 更新是否成功
+        """
+        with self.get_cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE tasks
+                SET markdown_path = ?,
+                    json_path = ?,
+                    image_dir = ?
+                WHERE task_id = ?
+            """,
+                (markdown_path, json_path, image_dir, task_id),
+            )
+            return cursor.rowcount > 0
+
     def _notify_redis_task_done(self, task_id: str, worker_id: str, status: str):
         """
         通知 Redis 任务已完成/失败
@@ -588,6 +754,50 @@ class TaskDB:
             )
             return [dict(row) for row in cursor.fetchall()]
 
+    def list_tasks(
+        self,
+        user_id: str = None,
+        status: str = None,
+        limit: int = 100,
+        columns: tuple = DEFAULT_LIST_COLUMNS,
+    ) -> List[Dict]:
+        """
+        获取任务列表（按创建时间倒序）
+
+        Args:
+            user_id: 用户ID（可选，为 None 时不按用户筛选）
+            status: 任务状态（可选，为 None 时不按状态筛选）
+            limit: 返回数量限制
+            columns: 返回的字段（默认不含 options 等大字段）
+
+        Returns:
+            tasks: 任务列表
+
+        安全说明：
+            columns 只能来自代码内的固定字段列表，筛选条件使用参数绑定
+        """
+        conditions = []
+        params = []
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        sql = f"""
+            SELECT {", ".join(columns)} FROM tasks
+            {where_clause}
+            ORDER BY created_at DESC
+            LIMIT ?
+        """
+        params.append(limit)
+
+        with self.get_cursor() as cursor:
+            cursor.execute(sql, params)
+            return [dict(row) for row in cursor.fetchall()]
+
     def cleanup_old_task_records(self, days: int = 30):
         """
         清理旧任务（同时删除所有相关文件和数据库记录）
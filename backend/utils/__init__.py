@@ -4,5 +4,6 @@ Backend 工具函数模块
 
 from .pdf_utils import convert_pdf_to_images
 from .perse_uitls import parse_list_arg
+from .result_utils import find_result_artifacts
 
-__all__ = ["convert_pdf_to_images", "parse_list_arg"]
+__all__ = ["convert_pdf_to_images", "parse_list_arg", "find_result_artifacts"]
@@ -2,66 +2,254 @@
 PDF 处理工具函数
 """
 
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any
 from loguru import logger
 
+# 页面图片格式（png / jpg / webp）；OCR 对 Q90 JPEG 不敏感，JPEG 编码更快、体积更小
+PDF_IMAGE_FORMAT = os.getenv("PDF_IMAGE_FORMAT", "jpg").lower()
 
-def convert_pdf_to_images(pdf_path: Path, output_dir: Path, zoom: float = 2.0, dpi: Optional[int] = None) -> List[Path]:
+# 页面 PNG 的 zlib 压缩级别（中间产物仅供 OCR 使用，像素无损即可，优先编码速度）
+PDF_PNG_COMPRESS_LEVEL = int(os.getenv("PDF_PNG_COMPRESS_LEVEL", "1"))
+
+# 页面 JPEG / WebP 的质量
+PDF_IMAGE_QUALITY = int(os.getenv("PDF_IMAGE_QUALITY", "90"))
+
+# 支持的图片格式 -> (文件扩展名, Pillow 格式名)
+_IMAGE_FORMATS = {
+    "png": ("png", "PNG"),
+    "jpg": ("jpg", "JPEG"),
+    "jpeg": ("jpg", "JPEG"),
+    "webp": ("webp", "WEBP"),
+    # 未压缩位图：PPM 头 + 原始像素，不经过任何编码（供同机读取原始位图的下游使用）
+    "ppm": ("ppm", "PPM"),
+}
+
+
+def open_pdf(pdf_path):
+    """
+    打开 PDF 文档（可作为上下文管理器使用，退出时关闭）
+
+    "读取页数 → 拆分" 等连续步骤可共用同一个文档对象（各函数的 doc 参数），同一文件只解析一次 xref 表；
+    文档对象非线程安全，不要跨线程并发使用。
+    """
+    import fitz  # PyMuPDF
+
+    return fitz.open(os.fspath(pdf_path))
+
+
+def _write_ppm(path: str, pix) -> None:
+    """将 Pixmap 的原始像素直接写为 PPM/PGM（os.write 直写文件描述符，零拷贝读取像素缓冲区）"""
+    if pix.alpha:
+        raise ValueError("PPM output does not support pixmaps with alpha")
+    magic = b"P6" if pix.n == 3 else b"P5"
+    header = b"%s\n%d %d\n255\n" % (magic, pix.width, pix.height)
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        for data in (memoryview(header), pix.samples_mv):
+            while data:
+                data = data[os.write(fd, data) :]
+    finally:
+        os.close(fd)
+
+
+def _render_pdf_pages(
+    pdf_path: str,
+    page_nums: List[int],
+    zoom: float,
+    output_dir: str,
+    stem: str,
+    image_format: str,
+    target_long_edge: Optional[int] = None,
+    on_page_ready: Optional[Callable[[Path], None]] = None,
+    grayscale: bool = False,
+    doc=None,
+) -> List[str]:
+    """
+    渲染 PDF 的指定页并保存为图片（可在子进程中执行）
+
+    Args:
+        doc: 已打开的文档（可选，仅限当前进程内调用；未传入时自行打开，渲染完成后关闭）
+
+    Returns:
+        按 page_nums 顺序的图片路径列表
+    """
+    if doc is None:
+        with open_pdf(pdf_path) as doc:
+            return _render_pdf_pages(
+                pdf_path,
+                page_nums,
+                zoom,
+                output_dir,
+                stem,
+                image_format,
+                target_long_edge=target_long_edge,
+                on_page_ready=on_page_ready,
+                grayscale=grayscale,
+                doc=doc,
+            )
+
+    import fitz  # PyMuPDF
+
+    try:
+        import PIL  # noqa: F401  # Pillow 可用时通过 pil_save 控制压缩级别 / 质量
+        use_pil = True
+    except ImportError:
+        use_pil = False
+
+    ext, pil_format = _IMAGE_FORMATS[image_format]
+    if pil_format == "WEBP" and not use_pil:
+        raise RuntimeError("Pillow is required for WebP output")
+    save_options = {"compress_level": PDF_PNG_COMPRESS_LEVEL} if pil_format == "PNG" else {"quality": PDF_IMAGE_QUALITY}
+
+    # 循环不变量：缩放矩阵与输出路径前缀只构造一次
+    mat = fitz.Matrix(zoom, zoom)
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    path_prefix = os.path.join(output_dir, f"{stem}_page")
+    image_paths = []
+    for page_num in page_nums:
+        page = doc[page_num]
+        if target_long_edge:
+            # 按页面尺寸计算缩放，使输出图片长边恰为 target_long_edge
+            page_zoom = target_long_edge / max(page.rect.width, page.rect.height)
+            page_mat = fitz.Matrix(page_zoom, page_zoom)
+        else:
+            page_mat = mat
+
+        # 渲染为图片（不带 alpha 通道，页面铺白底）
+        pix = page.get_pixmap(matrix=page_mat, colorspace=colorspace, alpha=False)
+
+        # 统一命名格式
+        image_path = f"{path_prefix}{page_num + 1}.{ext}"
+        if pil_format == "PPM":
+            _write_ppm(image_path, pix)
+        elif use_pil:
+            pix.pil_save(image_path, format=pil_format, **save_options)
+        elif pil_format == "JPEG":
+            pix.save(image_path, jpg_quality=PDF_IMAGE_QUALITY)
+        else:
+            pix.save(image_path)
+        image_paths.append(image_path)
+
+        logger.debug(f"   Converted page {page_num + 1} to {pil_format}")
+
+        if on_page_ready is not None:
+            on_page_ready(Path(image_path))
+    return image_paths
+
+
+def convert_pdf_to_images(
+    pdf_path: Path,
+    output_dir: Path,
+    zoom: float = 2.0,
+    dpi: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    image_format: Optional[str] = None,
+    target_long_edge: Optional[int] = None,
+    on_page_ready: Optional[Callable[[Path], None]] = None,
+    grayscale: Optional[bool] = None,
+) -> List[Path]:
     """
     将 PDF 所有页转换为图片
 
+    多页 PDF 按连续页段分配到多个子进程并行渲染（栅格化 + 图片编码均为 CPU 密集型）；
+    spawn 子进程需重新导入 PyMuPDF，启动开销远大于渲染几页的耗时，页数较少时直接在当前进程渲染
+
     Args:
         pdf_path: PDF 文件路径
         output_dir: 输出目录
         zoom: 缩放比例（默认 2.0，即 2 倍）
         dpi: DPI 设置（可选，如果设置则会覆盖 zoom）
+        max_workers: 渲染进程数上限（默认读取 PDF_RENDER_WORKERS，未设置时为 min(4, CPU 核数)）；
+            每个进程至少分配 PDF_RENDER_MIN_PAGES_PER_WORKER 页（默认 8），不足时减少进程数
+        image_format: 图片格式 png / jpg / webp / ppm（默认读取 PDF_IMAGE_FORMAT，未设置时为 jpg；
+            ppm 为未压缩的原始位图，跳过编码，适合同机直接读取位图的下游）
+        target_long_edge: 输出图片长边像素数（可选，按每页尺寸计算缩放，会覆盖 zoom 和 dpi；
+            默认读取 PDF_RENDER_LONG_EDGE，未设置时不启用）。设为下游模型的输入尺寸可避免渲染多余像素
+        on_page_ready: 页面图片写盘后的回调（可选，按页序调用），调用方可边渲染边处理已完成的页面
+        grayscale: 是否渲染为灰度图（默认读取 PDF_RENDER_GRAYSCALE，未设置时为 False）。
+            纯文本文档可开启，像素数据量为 RGB 的 1/3
 
     Returns:
         转换后的图片路径列表
     """
     try:
-        import fitz  # PyMuPDF
+        image_format = (image_format or PDF_IMAGE_FORMAT).lower()
+        if image_format not in _IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format}")
 
-        # 打开 PDF
-        doc = fitz.open(str(pdf_path))
+        # 渲染前统一创建输出目录（各页只写文件，不再逐页检查目录）
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
 
-        # 获取页数
-        page_count = len(doc)
+        # 获取页数（单进程渲染时直接复用该文档）
+        doc = open_pdf(pdf_path)
+        try:
+            page_count = len(doc)
+        except BaseException:
+            doc.close()
+            raise
 
         logger.info(f"📄 PDF has {page_count} pages")
 
-        image_paths = []
-
-        # 处理所有页面
-        for page_num in range(page_count):
-            page = doc[page_num]
-
-            # 设置缩放/DPI
-            if dpi:
-                # 如果指定了 DPI，计算对应的缩放比例
-                # 默认 PDF DPI 是 72
-                zoom = dpi / 72.0
-
-            mat = fitz.Matrix(zoom, zoom)
-
-            # 渲染为图片
-            pix = page.get_pixmap(matrix=mat)
-
-            # 保存为 PNG（统一命名格式）
-            image_path = output_dir / f"{pdf_path.stem}_page{page_num + 1}.png"
-
-            pix.save(str(image_path))
-            image_paths.append(image_path)
-
-            logger.debug(f"   Converted page {page_num + 1}/{page_count} to PNG")
-
-        # 关闭文档
-        doc.close()
-
-        logger.info(f"   Converted all {page_count} pages to PNG")
-
-        return image_paths
+        # 设置缩放/DPI
+        if dpi:
+            # 如果指定了 DPI，计算对应的缩放比例
+            # 默认 PDF DPI 是 72
+            zoom = dpi / 72.0
+
+        if target_long_edge is None:
+            target_long_edge = int(os.getenv("PDF_RENDER_LONG_EDGE", "0")) or None
+        if grayscale is None:
+            grayscale = os.getenv("PDF_RENDER_GRAYSCALE", "false").lower() == "true"
+
+        render = partial(
+            _render_pdf_pages,
+            str(pdf_path),
+            zoom=zoom,
+            output_dir=str(output_dir),
+            stem=pdf_path.stem,
+            image_format=image_format,
+            target_long_edge=target_long_edge,
+            grayscale=grayscale,
+        )
+
+        if max_workers is None:
+            max_workers = int(os.getenv("PDF_RENDER_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+        min_pages_per_worker = max(1, int(os.getenv("PDF_RENDER_MIN_PAGES_PER_WORKER", "8")))
+        max_workers = max(1, min(max_workers, page_count // min_pages_per_worker))
+
+        if max_workers == 1:
+            # 页数较少或单进程：直接在当前进程渲染，复用已打开的文档
+            with doc:
+                image_paths = render(list(range(page_count)), on_page_ready=on_page_ready, doc=doc)
+        else:
+            # 子进程各自打开文档，当前进程的文档不再需要
+            doc.close()
+            # 按连续页段拆分，每个子进程只打开一次文档；按页段顺序收集以保持页序
+            step = -(-page_count // max_workers)
+            page_ranges = [list(range(i, min(i + step, page_count))) for i in range(0, page_count, step)]
+            # spawn：不继承父进程（可能已初始化 CUDA）的状态
+            with ProcessPoolExecutor(
+                max_workers=len(page_ranges), mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                futures = [pool.submit(render, pages) for pages in page_ranges]
+                image_paths = []
+                # 回调无法传入子进程：每个页段完成后在当前进程按页序回调
+                for future in futures:
+                    for path in future.result():
+                        image_paths.append(path)
+                        if on_page_ready is not None:
+                            on_page_ready(Path(path))
+
+        logger.info(f"   Converted all {page_count} pages to {image_format.upper()}")
+
+        return [Path(path) for path in image_paths]
 
     except ImportError:
         logger.error("❌ PyMuPDF not installed. Install with: pip install PyMuPDF")
@@ -71,23 +259,22 @@ def convert_pdf_to_images(pdf_path: Path, output_dir: Path, zoom: float = 2.0, d
         raise
 
 
-def get_pdf_page_count(pdf_path: Path) -> int:
+def get_pdf_page_count(pdf_path: Path, doc=None) -> int:
     """
     获取 PDF 文件的总页数
 
     Args:
         pdf_path: PDF 文件路径
+        doc: 已打开的文档（可选，传入后直接读取页数，调用方负责关闭；随后可传给 split_pdf_file 复用）
 
     Returns:
         int: 页数
     """
     try:
-        import fitz  # PyMuPDF
-        
-        doc = fitz.open(str(pdf_path))
-        count = len(doc)
-        doc.close()
-        return count
+        if doc is not None:
+            return len(doc)
+        with open_pdf(pdf_path) as doc:
+            return len(doc)
     except Exception as e:
         logger.error(f"❌ Failed to get PDF page count: {e}")
         # 如果读取失败，返回 0 或抛出异常，视业务逻辑而定
@@ -95,11 +282,58 @@ def get_pdf_page_count(pdf_path: Path) -> int:
         return 0
 
 
+def _make_pdf_chunk(pdf_path: str, start_page: int, end_page: int, chunk_path: str, doc=None) -> Dict[str, Any]:
+    """
+    生成单个 PDF 分块（可在子进程中执行）
+
+    Args:
+        start_page: 起始页 (0-based，包含)
+        end_page: 结束页 (0-based，不包含)
+        doc: 已打开的源文档（可选，仅限当前进程内调用；未传入时自行打开，生成后关闭）
+    """
+    import fitz  # PyMuPDF
+
+    if doc is None:
+        with open_pdf(pdf_path) as doc:
+            return _make_pdf_chunk(pdf_path, start_page, end_page, chunk_path, doc=doc)
+
+    # 创建新的 PDF 文档
+    new_doc = fitz.open()
+
+    # 插入页面 (from_page 是包含的, to_page 也是包含的，fitz 使用 0-based 索引)
+    # insert_pdf 参数: from_page, to_page
+    # links=False：跳过链接重建（需逐个解析跳转目标页，渲染 / OCR 均不可见）；注释和表单控件会被渲染，保留
+    new_doc.insert_pdf(doc, from_page=start_page, to_page=end_page - 1, links=False, show_progress=0)
+
+    # 分块仅是中间产物：显式关闭压缩 / 垃圾回收 / 内容清理，避免额外的 CPU 开销
+    new_doc.save(
+        chunk_path,
+        garbage=0,
+        clean=False,
+        deflate=False,
+        deflate_images=False,
+        deflate_fonts=False,
+        pretty=False,
+    )
+    new_doc.close()
+
+    logger.debug(f"   Created chunk: {os.path.basename(chunk_path)} ({end_page - start_page} pages)")
+
+    return {
+        "path": chunk_path,
+        "start_page": start_page + 1,  # 1-based
+        "end_page": end_page,  # 1-based
+        "page_count": end_page - start_page,
+    }
+
+
 def split_pdf_file(
     pdf_path: Path, 
     output_dir: Path, 
     chunk_size: int = 500, 
-    parent_task_id: str = ""
+    parent_task_id: str = "",
+    max_workers: Optional[int] = None,
+    doc=None,
 ) -> List[Dict[str, Any]]:
     """
     将大 PDF 文件拆分为多个小文件
@@ -109,6 +343,11 @@ def split_pdf_file(
         output_dir: 输出目录
         chunk_size: 每个分块的页数
         parent_task_id: 父任务 ID（用于日志或命名）
+        max_workers: 并行生成分块的进程数上限（默认读取 PDF_SPLIT_WORKERS，未设置时为 2）；
+            每个进程至少分配 PDF_SPLIT_MIN_CHUNKS_PER_WORKER 个分块（默认 4），不足时在当前进程生成
+            （spawn 子进程需重新导入调用方主模块与 PyMuPDF 并重新打开源文档，分块少时得不偿失）
+        doc: 已打开的源文档（可选，如 get_pdf_page_count 使用的文档，调用方负责关闭；
+            未传入时自行打开，拆分完成后关闭）
 
     Returns:
         List[Dict]: 分块信息列表，每个元素包含:
@@ -118,47 +357,42 @@ def split_pdf_file(
             - page_count: 该分块页数
     """
     try:
-        import fitz  # PyMuPDF
-
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        doc = fitz.open(str(pdf_path))
+        if doc is None:
+            with open_pdf(pdf_path) as doc:
+                return split_pdf_file(pdf_path, output_dir, chunk_size, parent_task_id, max_workers, doc=doc)
+
         total_pages = len(doc)
-        chunks = []
 
         logger.info(f"✂️ Splitting PDF ({total_pages} pages) into chunks of {chunk_size}")
 
         # 计算分块
-        for i in range(0, total_pages, chunk_size):
-            start_page = i
-            end_page = min(i + chunk_size, total_pages)
-            
-            # 创建新的 PDF 文档
-            new_doc = fitz.open()
-            
-            # 插入页面 (from_page 是包含的, to_page 也是包含的，fitz 使用 0-based 索引)
-            # insert_pdf 参数: from_page, to_page
-            new_doc.insert_pdf(doc, from_page=start_page, to_page=end_page - 1)
-            
-            # 生成文件名: original_pages_1-500.pdf
-            # 注意：对外文件名使用 1-based 索引，符合人类直觉
-            chunk_filename = f"{pdf_path.stem}_pages_{start_page + 1}-{end_page}.pdf"
-            chunk_path = output_dir / chunk_filename
-            
-            new_doc.save(str(chunk_path))
-            new_doc.close()
-
-            chunks.append({
-                "path": str(chunk_path),
-                "start_page": start_page + 1,  # 1-based
-                "end_page": end_page,          # 1-based
-                "page_count": end_page - start_page
-            })
-
-            logger.debug(f"   Created chunk: {chunk_filename} ({end_page - start_page} pages)")
-
-        doc.close()
+        # 生成文件名: original_pages_1-500.pdf
+        # 注意：对外文件名使用 1-based 索引，符合人类直觉
+        chunk_specs = []
+        for start_page in range(0, total_pages, chunk_size):
+            end_page = min(start_page + chunk_size, total_pages)
+            chunk_path = output_dir / f"{pdf_path.stem}_pages_{start_page + 1}-{end_page}.pdf"
+            chunk_specs.append((start_page, end_page, str(chunk_path)))
+
+        if max_workers is None:
+            max_workers = int(os.getenv("PDF_SPLIT_WORKERS", "0")) or 2
+        min_chunks_per_worker = max(1, int(os.getenv("PDF_SPLIT_MIN_CHUNKS_PER_WORKER", "4")))
+        max_workers = max(1, min(max_workers, len(chunk_specs) // min_chunks_per_worker))
+
+        if max_workers == 1:
+            # 分块较少或单进程：直接复用已打开的源文档
+            chunks = [_make_pdf_chunk(str(pdf_path), start, end, path, doc=doc) for start, end, path in chunk_specs]
+        else:
+            # 各分块互不依赖：子进程各自打开源文档并行生成（PyMuPDF 不支持多线程），按分块顺序收集
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [
+                    pool.submit(_make_pdf_chunk, str(pdf_path), start, end, path) for start, end, path in chunk_specs
+                ]
+                chunks = [future.result() for future in futures]
+
         return chunks
 
     except Exception as e:
@@ -0,0 +1,69 @@
+"""
+任务结果目录工具函数
+"""
+
+import os
+from collections import deque
+from pathlib import Path
+from typing import Optional, Dict
+
+# 主 JSON 结果文件名（MinerU 的 {filename}_content_list.json 另行匹配）
+RESULT_JSON_NAMES = ("content.json", "result.json")
+
+
+def find_result_artifacts(result_dir: Path) -> Dict[str, Optional[str]]:
+    """
+    在任务结果目录中定位主要产物
+
+    Worker 在任务完成时调用一次并写入数据库，API 直接读取，
+    避免每次查询任务状态都递归扫描结果目录。
+
+    Args:
+        result_dir: 任务结果目录
+
+    Returns:
+        {"markdown_path": ..., "json_path": ..., "image_dir": ...}，不存在的产物为 None
+    """
+    md_file = None
+    first_md = None
+    json_file = None
+
+    # 广度优先 os.scandir 遍历：不为每个条目构造 Path 对象，找到 result.md 和主 JSON 后立即停止
+    pending_dirs = deque([os.fspath(result_dir)])
+    while pending_dirs and not (md_file and json_file):
+        current_dir = pending_dirs.popleft()
+        # 跳过 page_* 目录下的逐页 JSON 结果
+        in_page_dir = os.path.basename(current_dir).startswith("page_")
+        try:
+            with os.scandir(current_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending_dirs.append(entry.path)
+                        continue
+                    name = entry.name
+                    if name.endswith(".md"):
+                        # 主 Markdown 文件（优先 result.md）
+                        if name == "result.md" and md_file is None:
+                            md_file = entry.path
+                        elif first_md is None:
+                            first_md = entry.path
+                    elif (
+                        json_file is None
+                        and not in_page_dir
+                        and name.endswith(".json")
+                        and (name in RESULT_JSON_NAMES or "_content_list.json" in name)
+                    ):
+                        json_file = entry.path
+        except OSError:
+            continue
+
+    md_file = md_file or first_md
+
+    # 图片目录（Worker 已规范化为 images/）
+    image_dir = Path(md_file).parent / "images" if md_file else None
+
+    return {
+        "markdown_path": md_file,
+        "json_path": json_file,
+        "image_dir": str(image_dir) if image_dir and image_dir.is_dir() else None,
+    }